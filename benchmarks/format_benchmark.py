@@ -0,0 +1,35 @@
+import os
+from contextlib import redirect_stdout
+from time import perf_counter
+
+from loggerz.Loggerz import LogLevel, Loggerz, State
+
+RECORDS = 100_000
+
+
+def measure(log: Loggerz, log_level: LogLevel, message: str, sticky: bool = False) -> float:
+    start = perf_counter()
+    for i in range(RECORDS):
+        log.log(log_level, "benchmark", message, sticky)
+    return RECORDS / (perf_counter() - start)
+
+
+if __name__ == '__main__':
+    log = Loggerz()
+    log.set_target_log_level(LogLevel.EPHEMERAL)
+    log.set_terminal_movements_mode(State.ON)
+
+    results = []
+    with open(os.devnull, "w") as devnull, redirect_stdout(devnull):
+        for color_mode in (State.ON, State.OFF):
+            log.set_color_mode(color_mode)
+            colors = "colors " + color_mode.name
+            results.append((colors + ", INFO", measure(log, LogLevel.INFO, "A plain log message")))
+            results.append((colors + ", WARNING", measure(log, LogLevel.WARNING, "A plain log message")))
+            results.append((colors + ", 3 lines", measure(log, LogLevel.INFO, "A multiline\nlog\nmessage")))
+            results.append((colors + ", sticky", measure(log, LogLevel.INFO, "[------>       ]", True)))
+            log.remove_sticky()
+        log.cleanup()
+
+    for name, records_per_second in results:
+        print(f"{name:<25} {records_per_second:>12,.0f} records/s")
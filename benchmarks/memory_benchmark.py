@@ -0,0 +1,54 @@
+import os
+import tracemalloc
+from contextlib import redirect_stdout
+from time import perf_counter, time
+
+from loggerz.Loggerz import LogLevel, Loggerz, State
+
+RECORDS = 1_000_000
+TRACED_RECORDS = 100_000  # Logging under tracemalloc is much slower
+
+
+def measure_record_footprint() -> float:
+    originator = "benchmark"
+    message = "A plain log message"
+    now = time()
+
+    tracemalloc.start()
+    records = [Loggerz.Logz(LogLevel.INFO, originator, message, now, False) for _ in range(RECORDS)]
+    size, _ = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+
+    size -= len(records) * 8  # Only count the records, not the list holding them
+    return size / RECORDS
+
+
+def measure_logging(log: Loggerz, sticky: bool) -> tuple:
+    start = perf_counter()
+    for i in range(RECORDS):
+        log.log(LogLevel.INFO, "benchmark", "A plain log message", sticky)
+    records_per_second = RECORDS / (perf_counter() - start)
+
+    tracemalloc.start()
+    for i in range(TRACED_RECORDS):
+        log.log(LogLevel.INFO, "benchmark", "A plain log message", sticky)
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+
+    return records_per_second, peak
+
+
+if __name__ == '__main__':
+    log = Loggerz()
+    log.set_terminal_movements_mode(State.ON)
+    log.set_color_mode(State.ON)
+
+    print(f"Logz footprint, {RECORDS:,} records kept alive: {measure_record_footprint():.1f} bytes/record")
+
+    with open(os.devnull, "w") as devnull, redirect_stdout(devnull):
+        results = [("INFO logs", measure_logging(log, False)), ("sticky updates", measure_logging(log, True))]
+        log.cleanup()
+
+    for name, (records_per_second, peak) in results:
+        print(f"{RECORDS:,} {name}: {records_per_second:,.0f} records/s, "
+              f"peak traced memory {peak / 1024:.1f} KiB")
@@ -0,0 +1,35 @@
+import os
+from contextlib import redirect_stdout
+from time import perf_counter
+
+from loggerz.Loggerz import LogLevel, Loggerz, State
+
+LINE = "a line of a long traceback or of a table dump"
+
+
+def measure(log: Loggerz, log_level: LogLevel, lines: int, sticky: bool = False) -> float:
+    message = "\n".join([LINE] * lines)
+    start = perf_counter()
+    log.log(log_level, "benchmark", message, sticky)
+    return perf_counter() - start
+
+
+if __name__ == '__main__':
+    log = Loggerz()
+    log.set_target_log_level(LogLevel.EPHEMERAL)
+    log.set_terminal_movements_mode(State.ON)
+    log.set_color_mode(State.ON)
+
+    results = []
+    with open(os.devnull, "w") as devnull, redirect_stdout(devnull):
+        for lines in (1_000, 10_000, 100_000):
+            results.append((f"{lines:,} lines, INFO", measure(log, LogLevel.INFO, lines)))
+            results.append((f"{lines:,} lines, FATAL", measure(log, LogLevel.FATAL, lines)))
+            results.append((f"{lines:,} lines, ephemeral", measure(log, LogLevel.EPHEMERAL, lines)))
+            results.append((f"{lines:,} lines, sticky", measure(log, LogLevel.INFO, lines, True)))
+            log.remove_sticky()
+            log.remove_ephemerals()
+        log.cleanup()
+
+    for name, seconds in results:
+        print(f"{name:<28} {seconds * 1000:>10.2f} ms")
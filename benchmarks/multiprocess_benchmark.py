@@ -0,0 +1,40 @@
+import os
+import sys
+from concurrent.futures import ProcessPoolExecutor
+from contextlib import redirect_stdout
+from time import perf_counter
+
+from loggerz.Loggerz import LogLevel, Loggerz, State
+
+WORKERS = 32
+LOGS_PER_WORKER = 5_000
+
+
+def connect(log_server_queue):
+    Loggerz().connect_to_log_server(log_server_queue)
+
+
+def work(worker: int) -> int:
+    log = Loggerz()
+    for i in range(LOGS_PER_WORKER):
+        log.log(LogLevel.INFO, f"worker-{worker}", "Processing item %d", args=(i,))
+        if i % 100 == 0:
+            log.log(LogLevel.INFO, f"worker-{worker}", f"[{i // 100:>3}/{LOGS_PER_WORKER // 100}]", True)
+    return LOGS_PER_WORKER
+
+
+if __name__ == '__main__':
+    log = Loggerz()
+    log.set_terminal_movements_mode(State.ON)
+    log.set_max_refresh_rate(30)
+    log_server_queue = log.start_log_server()
+
+    with open(os.devnull, "w") as devnull, redirect_stdout(devnull):
+        start = perf_counter()
+        with ProcessPoolExecutor(WORKERS, initializer=connect, initargs=(log_server_queue,)) as pool:
+            total_logs = sum(pool.map(work, range(WORKERS)))
+        log.cleanup()  # Waits until the log server has printed everything
+        elapsed = perf_counter() - start
+
+    print(f"{WORKERS} processes, {total_logs:,} logs in {elapsed:.2f} s: {total_logs / elapsed:,.0f} logs/s",
+          file=sys.stderr)
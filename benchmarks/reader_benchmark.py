@@ -0,0 +1,49 @@
+import os
+import sys
+import tempfile
+from contextlib import redirect_stdout
+from time import perf_counter
+
+from loggerz.Loggerz import LogLevel, Loggerz
+from loggerz.reader.LogReader import LogReader
+from loggerz.sinks.Sinks import BufferedFileSink
+from loggerz.time_utils.TimeUtils import TimestampFormat
+
+RECORDS = 1_000_000
+ORIGINATORS = ["db", "http", "cache", "auth", "worker", "scheduler", "mailer"]
+LOG_LEVELS = [LogLevel.DEBUG, LogLevel.INFO, LogLevel.INFO, LogLevel.INFO, LogLevel.WARNING, LogLevel.ERROR]
+
+
+def write_log(path: str):
+    log = Loggerz()
+    log.set_target_log_level(LogLevel.DEBUG)
+    sink = BufferedFileSink(path, buffer_size=1024 * 1024, timestamp_format=TimestampFormat.DATETIME)
+    log.add_sink(sink)
+    with open(os.devnull, "w") as devnull, redirect_stdout(devnull):
+        for start in range(0, RECORDS, 10_000):
+            log.log_many((LOG_LEVELS[i % len(LOG_LEVELS)], ORIGINATORS[i % len(ORIGINATORS)],
+                          "Request %d served in %d ms", False, (i, i % 250)) for i in range(start, start + 10_000))
+    log.remove_sink(sink)
+    sink.close()
+
+
+if __name__ == '__main__':
+    with tempfile.TemporaryDirectory() as directory:
+        path = os.path.join(directory, "benchmark.log")
+        write_log(path)
+        print(f"{RECORDS:,} records, {os.path.getsize(path) / 1024 / 1024:.0f} MiB", file=sys.stderr)
+
+        start = perf_counter()
+        scanned = sum(1 for record in LogReader(path).records()
+                      if record.log_level >= LogLevel.ERROR and record.originator == "db")
+        print(f"Full scan:      {perf_counter() - start:.2f} s, {scanned:,} matches", file=sys.stderr)
+
+        start = perf_counter()
+        index_path = LogReader(path).index_path
+        LogReader(path).get_index()
+        print(f"Index build:    {perf_counter() - start:.2f} s, {os.path.getsize(index_path) / 1024 / 1024:.1f} MiB",
+              file=sys.stderr)
+
+        start = perf_counter()
+        queried = sum(1 for _ in LogReader(path).query(LogLevel.ERROR, "db"))
+        print(f"Indexed query:  {perf_counter() - start:.2f} s, {queried:,} matches", file=sys.stderr)
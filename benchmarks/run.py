@@ -0,0 +1,195 @@
+import argparse
+import json
+import os
+import platform
+import subprocess
+import sys
+from datetime import datetime, timezone
+from time import perf_counter
+
+from loggerz.Loggerz import LogLevel, Loggerz, State
+
+MULTILINE_MESSAGE = "Traceback (most recent call last):\n  File \"main.py\", line 1\n    boom()\nNameError: boom"
+
+
+class CountingStream:
+    def __init__(self, stream):
+        self.stream = stream
+        self.encoding = stream.encoding
+        self.bytes_written = 0
+
+    def write(self, output: str) -> int:
+        self.bytes_written += len(output) if output.isascii() else len(output.encode(self.encoding))
+        return self.stream.write(output)
+
+    def flush(self):
+        self.stream.flush()
+
+    def isatty(self) -> bool:
+        return self.stream.isatty()
+
+
+def scenario_info(log: Loggerz, records: int):
+    for i in range(records):
+        log.log(LogLevel.INFO, "benchmark", "Processing item %d", args=(i,))
+
+
+def scenario_filtered_debug(log: Loggerz, records: int):
+    for i in range(records):
+        log.log(LogLevel.DEBUG, "benchmark", "Processing item %d", args=(i,))
+
+
+def scenario_multiline(log: Loggerz, records: int):
+    for i in range(records):
+        log.log(LogLevel.ERROR, "benchmark", MULTILINE_MESSAGE)
+
+
+def scenario_sticky_progress(log: Loggerz, records: int):
+    for i in range(records):
+        done = i * 40 // records
+        log.log(LogLevel.INFO, "benchmark", "[" + "=" * done + ">" + " " * (40 - done) + "]", True)
+
+
+def scenario_ephemeral_churn(log: Loggerz, records: int):
+    for i in range(log.max_ephemeral_messages):  # Start with the ephemeral lines already at their limit
+        log.log(LogLevel.EPHEMERAL, "benchmark", "Warming up %d", args=(i,))
+    for i in range(records):
+        log.log(LogLevel.EPHEMERAL, "benchmark", "Processing item %d", args=(i,))
+
+
+# Each scenario runs with its own target log level
+SCENARIOS = {
+    "info": (scenario_info, LogLevel.INFO),
+    "filtered_debug": (scenario_filtered_debug, LogLevel.INFO),
+    "multiline": (scenario_multiline, LogLevel.INFO),
+    "sticky_progress": (scenario_sticky_progress, LogLevel.INFO),
+    "ephemeral_churn": (scenario_ephemeral_churn, LogLevel.EPHEMERAL),
+}
+
+
+def open_output(output: str) -> tuple:
+    """
+    Return the stream to log to and a function that closes it and whatever is reading from it.
+    """
+    if output == "devnull":
+        stream = open(os.devnull, "w", encoding="utf-8")
+        return stream, stream.close
+    elif output == "pipe":
+        reader = subprocess.Popen(["cat"], stdin=subprocess.PIPE, stdout=subprocess.DEVNULL)
+        stream = open(reader.stdin.fileno(), "w", encoding="utf-8", closefd=False)
+
+        def close():
+            stream.close()
+            reader.stdin.close()
+            reader.wait()
+
+        return stream, close
+    else:
+        master_fd, slave_fd = os.openpty()
+        reader = subprocess.Popen(["cat"], stdin=master_fd, stdout=subprocess.DEVNULL,
+                                  stderr=subprocess.DEVNULL)
+        stream = open(slave_fd, "w", encoding="utf-8", buffering=1)  # Line buffered like a real terminal
+
+        def close():
+            stream.close()
+            reader.wait()  # cat stops with EIO once the slave is closed
+            os.close(master_fd)
+
+        return stream, close
+
+
+def run_scenario(log: Loggerz, name: str, output: str, colors: bool, records: int) -> dict:
+    scenario, target_log_level = SCENARIOS[name]
+    log.set_target_log_level(target_log_level)
+    log.set_color_mode(State.ON if colors else State.OFF)
+    log.set_terminal_movements_mode(State.ON)
+    log.set_max_refresh_rate(0)
+
+    stream, close = open_output(output)
+    counting_stream = CountingStream(stream)
+    real_stdout = sys.stdout
+    sys.stdout = counting_stream
+    try:
+        start = perf_counter()
+        scenario(log, records)
+        log.flush()
+        elapsed = perf_counter() - start
+        log.remove_sticky()
+        log.remove_ephemerals()
+        log.flush()
+    finally:
+        sys.stdout = real_stdout
+        close()
+
+    return {
+        "scenario": name,
+        "output": output,
+        "colors": colors,
+        "records": records,
+        "seconds": elapsed,
+        "records_per_second": records / elapsed,
+        "bytes_per_record": counting_stream.bytes_written / records,
+    }
+
+
+def get_commit() -> str:
+    try:
+        return subprocess.run(["git", "rev-parse", "--short", "HEAD"], capture_output=True, text=True,
+                              check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def compare(results: list, baseline_path: str, tolerance: float) -> bool:
+    with open(baseline_path, encoding="utf-8") as file:
+        baseline = {(r["scenario"], r["output"], r["colors"]): r for r in json.load(file)["results"]}
+
+    regressed = False
+    for result in results:
+        previous = baseline.get((result["scenario"], result["output"], result["colors"]))
+        if previous is None:
+            continue
+        ratio = result["records_per_second"] / previous["records_per_second"]
+        marker = ""
+        if ratio < 1 - tolerance:
+            marker = "  <-- REGRESSION"
+            regressed = True
+        print(f"{result['scenario']:<16} {result['output']:<8} colors {'on ' if result['colors'] else 'off'} "
+              f"{previous['records_per_second']:>12,.0f} -> {result['records_per_second']:>12,.0f} records/s "
+              f"({ratio:.2f}x){marker}", file=sys.stderr)
+    return not regressed
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description="Measure the cost of each log call and write the results as JSON.")
+    parser.add_argument("--records", type=int, default=50_000, help="log calls per scenario")
+    parser.add_argument("--scenario", action="append", choices=sorted(SCENARIOS), help="run only these scenarios")
+    parser.add_argument("--output", action="append", choices=["devnull", "pipe", "pty"],
+                        help="log only to these outputs")
+    parser.add_argument("--json", help="write the results to this file instead of stdout")
+    parser.add_argument("--compare", help="JSON results of a previous run, exit with 1 if a scenario got slower")
+    parser.add_argument("--tolerance", type=float, default=0.2, help="slowdown allowed by --compare (0.2 = 20%%)")
+    arguments = parser.parse_args()
+
+    log = Loggerz()
+    results = []
+    for output in arguments.output or ["devnull", "pipe", "pty"]:
+        for name in arguments.scenario or SCENARIOS:
+            for colors in (True, False):
+                results.append(run_scenario(log, name, output, colors, arguments.records))
+
+    report = {
+        "commit": get_commit(),
+        "date": datetime.now(timezone.utc).isoformat(),
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "results": results,
+    }
+    if arguments.json is not None:
+        with open(arguments.json, "w", encoding="utf-8") as file:
+            json.dump(report, file, indent=2)
+    else:
+        print(json.dumps(report, indent=2))
+
+    if arguments.compare is not None and not compare(results, arguments.compare, arguments.tolerance):
+        sys.exit(1)
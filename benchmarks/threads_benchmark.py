@@ -0,0 +1,50 @@
+import os
+import sys
+from contextlib import redirect_stdout
+from threading import Barrier, Thread
+from time import perf_counter
+
+from loggerz.Loggerz import LogLevel, Loggerz, State
+
+THREAD_COUNTS = [1, 2, 4, 8, 16, 32, 64]
+TOTAL_LOGS = 200_000
+
+
+def work(log: Loggerz, thread: int, logs: int, barrier: Barrier):
+    barrier.wait()  # Start all together
+    for i in range(logs):
+        log.log(LogLevel.INFO, f"thread-{thread}", "Processing item %d of %s", args=(i, "a multithreaded producer"))
+        if i % 100 == 0:
+            log.log(LogLevel.INFO, f"thread-{thread}", f"[{i // 100:>4}/{logs // 100}]", True)
+
+
+def run(log: Loggerz, thread_count: int) -> float:
+    logs = TOTAL_LOGS // thread_count
+    barrier = Barrier(thread_count + 1)
+    threads = [Thread(target=work, args=(log, thread, logs, barrier)) for thread in range(thread_count)]
+    for thread in threads:
+        thread.start()
+
+    barrier.wait()
+    start = perf_counter()
+    for thread in threads:
+        thread.join()
+    log.flush()
+    return logs * thread_count / (perf_counter() - start)
+
+
+if __name__ == '__main__':
+    log = Loggerz()
+    log.set_terminal_movements_mode(State.ON)
+    log.set_color_mode(State.ON)
+    log.set_max_refresh_rate(30)
+
+    results = []
+    with open(os.devnull, "w") as devnull, redirect_stdout(devnull):
+        for thread_count in THREAD_COUNTS:
+            results.append((thread_count, run(log, thread_count)))
+        log.cleanup()
+
+    for thread_count, logs_per_second in results:
+        print(f"{thread_count:>3} threads: {logs_per_second:>10,.0f} logs/s "
+              f"({logs_per_second / results[0][1]:.2f}x)", file=sys.stderr)
@@ -1,15 +1,29 @@
 from __future__ import annotations
 
-import shutil
+import asyncio
+import atexit
+import multiprocessing
+import os
 import sys
+import traceback
 from collections import deque
-from datetime import datetime
+from contextlib import contextmanager
 from enum import IntEnum
-from multiprocessing import Lock
+from json.encoder import encode_basestring
+from queue import Empty, Full, Queue
+from threading import Event, Lock, Thread, Timer, local
+from time import monotonic, perf_counter
 
+from loggerz.bridge.RedirectedStream import RedirectedStream
+from loggerz.rate_limit.RateLimiter import RateLimiter
 from loggerz.singleton.Singleton import Singleton
+from loggerz.sinks.NonBlockingStreamSink import NonBlockingStreamSink, set_result_unless_done
+from loggerz.sinks.Sinks import Format, Sink, TerminalSink
+from loggerz.stats.Stats import Stats
 from loggerz.terminal_utils import TerminalUtils
-from loggerz.terminal_utils.TerminalUtils import TerminalColors, TerminalMovements
+from loggerz.terminal_utils.TerminalUtils import TerminalColors, TerminalMovements, TerminalSizeCache, \
+    get_display_width, shorten_to_display_width
+from loggerz.time_utils.TimeUtils import Clock, TimestampFormat, TimestampFormatter, get_clock_function
 
 
 class State(IntEnum):
@@ -18,13 +32,135 @@ class State(IntEnum):
     AUTO = 2
 
 
-def erase_next_n_lines_and_rewind_as_string(erase_next_n_lines):
-    output = ""
-    for i in range(erase_next_n_lines):
-        output += TerminalMovements.ERASE_LINE_FORWARD
-        output += "\n"
-    output += TerminalUtils.get_move_cursor_up_as_string(erase_next_n_lines)
-    return output
+class QueuePolicy(IntEnum):
+    BLOCK = 0
+    """
+    When the queue is full the caller waits until the writer thread makes room.
+    """
+
+    DROP = 1
+    """
+    When the queue is full the log is discarded and counted as dropped.
+    """
+
+
+class _WriterQueue(Queue):
+    def __init__(self, maxsize: int):
+        super().__init__(maxsize)
+        self.writer_exited = Event()  # Set once the writer thread will not take anything else from the queue
+        self.__drain_waiters = []  # (loop, future, max_pending) of the coroutines in wait_for_writer()
+
+    async def wait_for_writer(self, max_pending: int):
+        """
+        Wait until no more than max_pending items are enqueued or being printed.
+        """
+        with self.mutex:
+            if self.unfinished_tasks <= max_pending:
+                return
+            loop = asyncio.get_running_loop()
+            waiter = loop.create_future()
+            self.__drain_waiters.append((loop, waiter, max_pending))
+        await waiter
+
+    def task_done(self):
+        super().task_done()
+        with self.mutex:
+            if len(self.__drain_waiters) > 0:
+                waiting = []
+                for loop, waiter, max_pending in self.__drain_waiters:
+                    if self.unfinished_tasks > max_pending:
+                        waiting.append((loop, waiter, max_pending))
+                        continue
+                    try:
+                        loop.call_soon_threadsafe(set_result_unless_done, waiter)
+                    except RuntimeError:
+                        pass  # The loop is closed, nobody is waiting anymore
+                self.__drain_waiters = waiting
+
+
+class _EventLoopTimer:
+    def __init__(self, loop: asyncio.AbstractEventLoop, delay: float, function):
+        """
+        Like threading.Timer, but function is called by loop, and it can be started from any thread.
+        """
+        self.__mutex = Lock()
+        self.__handle: asyncio.TimerHandle = None
+        self.__cancelled = False
+        loop.call_soon_threadsafe(self.__start, loop, delay, function)
+
+    def __start(self, loop: asyncio.AbstractEventLoop, delay: float, function):
+        with self.__mutex:
+            if not self.__cancelled:
+                self.__handle = loop.call_later(delay, function)
+
+    def cancel(self):
+        with self.__mutex:
+            self.__cancelled = True
+            if self.__handle is not None:
+                self.__handle.cancel()
+
+
+def render_message(message, args: tuple = None) -> str:
+    if callable(message):
+        message = message()
+    if args:
+        message = message % args
+    return message
+
+
+def render_recorded_message(message, args: tuple = None) -> str:
+    """
+    Like render_message(), but never fails: a message that cannot be rendered is shown as it was recorded.
+    """
+    try:
+        return render_message(message, args)
+    except Exception as exception:
+        return f"{message!r} % {args!r} ({type(exception).__name__}: {exception})"
+
+
+def parse_log_levels(text: str, separator: str = "\n") -> dict:
+    """
+    Parse entries like `db.pool = DEBUG` divided by separator, ignoring empty entries and # comments.
+    The originator `*` stands for the target log level of every other originator.
+    """
+    log_levels = {}
+    for entry in text.split(separator):
+        entry = entry.split("#", 1)[0].strip()
+        if entry == "":
+            continue
+
+        originator, equal, log_level_name = entry.partition("=")
+        if equal == "" or log_level_name.strip().upper() not in LogLevel.__members__:
+            raise ValueError(f"Invalid log level entry: '{entry}'")
+        log_levels[originator.strip()] = LogLevel[log_level_name.strip().upper()]
+
+    return log_levels
+
+
+def _report_error(description: str):
+    """
+    Print description and the exception being handled on stderr, like logging.Handler.handleError() does.
+    """
+    stderr = sys.stderr
+    if stderr is not None:
+        try:
+            stderr.write(f"--- Loggerz: {description} ---\n{traceback.format_exc()}")
+        except Exception:
+            pass  # Nowhere left to report it
+
+
+def _get_encoded_size(sink: Sink, output: str) -> int:
+    try:
+        return len(output.encode(getattr(sink, "encoding", None) or "utf-8", "replace"))
+    except LookupError:  # An encoding unknown here, the output has been written anyway
+        return len(output.encode("utf-8", "replace"))
+
+
+def _get_file_descriptor(stream) -> int:
+    try:
+        return stream.fileno()
+    except (AttributeError, OSError, ValueError):  # Not backed by a file, e.g. a StringIO
+        return None
 
 
 class Loggerz(metaclass=Singleton):
@@ -32,13 +168,24 @@ class Loggerz(metaclass=Singleton):
         self.__print_mutex = Lock()
         self.__volatile_lines_mutex = Lock()
         self.__target_log_level = LogLevel.INFO
+        self.__originator_log_levels = {}  # Overrides of the target log level, see set_originator_log_level()
+        self.__originator_log_levels_cache: dict = None  # Resolved target of each originator seen, None if no overrides
         self.__long_prefix = False
         self.__print_timestamp = True
+        self.__timestamp_format = TimestampFormat.TIME
+        self.__timestamp_formatters = {timestamp_format: TimestampFormatter(timestamp_format)
+                                       for timestamp_format in TimestampFormat}
+        self.__clock = get_clock_function(Clock.WALL)
         self.__originator_width = 10
 
+        # Prefix and colors of every (log_level, sticky) pair, rebuilt when one of the settings they depend on changes
+        self.__log_templates: dict = None
+        self.__plain_log_templates: dict = None
+
         # Perform a check to disable some features by default if they are not supported
         self.__colors_enabled: bool = None
         self.__terminal_movements_enabled: bool = None
+        self.__terminal_size = TerminalSizeCache()
         self.set_color_mode(State.AUTO)
         self.set_terminal_movements_mode(State.AUTO)
 
@@ -47,20 +194,341 @@ class Loggerz(metaclass=Singleton):
         self.ephemeral_logs = deque()
         self.current_sticky_message = None
 
+        # Outputs
+        self.__sinks = [TerminalSink()]
+        self.__output_format = Format.TEXT
+
+        # Volatile lines rendering
+        self.__drawn_volatile_frame = []  # The volatile lines currently on the screen below the cursor
+        self.__min_repaint_interval = 0.0
+        self.__last_repaint_time = 0.0
+        self.__repaint_pending = False
+        self.__repaint_timer: Timer = None
+
+        # Rate limit, see set_rate_limit()
+        self.__rate_limiter: RateLimiter = None
+        self.__rate_limit_report_timer: Timer = None  # Reports the suppressions that ended without further logs
+
+        # Flight recorder, see set_flight_recorder()
+        self.__flight_recorder: deque = None
+        self.__flight_recorder_trigger_log_level = LogLevel.ERROR
+
+        # Self-instrumentation, see set_stats_enabled()
+        self.__stats: Stats = None
+
+        # Asynchronous writer
+        self.__async_queue: _WriterQueue = None
+        self.__async_queue_size = 1024
+        self.__async_queue_policy = QueuePolicy.BLOCK
+        self.__async_writer: Thread = None
+        self.__async_batch_size = 256
+        self.__async_dropped_logs = 0
+
+        # Event loop mode, see attach_event_loop()
+        self.__event_loop: asyncio.AbstractEventLoop = None
+        self.__event_loop_max_pending = 1024
+        self.__event_loop_async_mode: tuple = None  # (queue_size, queue_policy) to restore on detach, if it was on
+        self.__event_loop_replaced_sinks = {}  # NonBlockingStreamSink -> the terminal sink it replaced
+
+        # Redirection of sys.stdout, see redirect_stdout()
+        self.__redirected_stdout: RedirectedStream = None
+        self.__stdout_replaced_sinks = {}  # Sink writing to the real stdout -> the sink it replaced
+
+        # Batches opened with batch(), one per thread
+        self.__batch_local = local()
+
+        # Multi-process mode, see start_log_server()
+        self.__log_server_queue: multiprocessing.Queue = None  # When set, this process only forwards its logs
+        self.__log_server_listener: Thread = None
+        self.__log_server_listener_queue: multiprocessing.Queue = None
+        self.__operation_codes = {
+            self.__do_log: _OPERATION_LOG,
+            self.__do_blank_line: _OPERATION_BLANK_LINE,
+            self.__do_remove_sticky: _OPERATION_REMOVE_STICKY,
+            self.__do_remove_ephemerals: _OPERATION_REMOVE_EPHEMERALS,
+        }
+
     def cleanup(self):
+        self.stop_log_server()  # Print what the other processes have already sent before clearing the screen
+        self.__report_rate_limit()
         self.remove_sticky()
         self.remove_ephemerals()
         self.__prepare_and_print(TerminalMovements.ERASE_SCREEN_FORWARD)
+        self.detach_event_loop()
+        self.__stop_async_writer()
+        self.__cancel_repaint_timer()
+        self.__cancel_rate_limit_report_timer()
+        self.restore_stdout()
+        self.__flush_sinks()
+
+    def flush(self):
+        self.__report_rate_limit()
+        if self.__async_queue is not None:
+            self.__async_queue.join()  # Wait for the writer thread to print everything enqueued so far
+        self.__flush_sinks()
+
+    def add_sink(self, sink: Sink):
+        with self.__print_mutex:
+            self.__sinks = self.__sinks + [self.__get_sink_bound_to_stdout(sink)]
+
+    def remove_sink(self, sink: Sink):
+        with self.__print_mutex:
+            self.__sinks = [s for s in self.__sinks
+                            if s is not sink and self.__stdout_replaced_sinks.get(s) is not sink]
+            self.__stdout_replaced_sinks = {s: r for s, r in self.__stdout_replaced_sinks.items() if r is not sink}
+        sink.flush()
+
+    def get_sinks(self) -> list:
+        """
+        Return the sinks currently written to, including those standing in for a terminal sink while stdout is
+        redirected or an event loop is attached.
+        """
+        return list(self.__sinks)
+
+    def __flush_sinks(self):
+        with self.__print_mutex:
+            for sink in self.__sinks:
+                try:
+                    sink.flush()
+                except Exception:
+                    _report_error(f"{type(sink).__name__} failed to flush")
+
+    def is_enabled(self, log_level: LogLevel, originator: str = None) -> bool:
+        cache = self.__originator_log_levels_cache
+        if originator is None or cache is None:
+            return log_level >= self.__target_log_level
+        return log_level >= self.__get_target_log_level(cache, originator)
 
     def blank_line(self, log_level: LogLevel):
-        if self.__should_be_logged(log_level):
-            self.__prepare_and_print("\n")
-
-    def log(self, log_level: LogLevel, originator: str, message: str, sticky=False):
-        if self.__should_be_logged(log_level):
-            self.__volatile_lines_mutex.acquire()
-            self.__prepare_and_print(self.__do_log, (log_level, originator, message, sticky))
-            self.__volatile_lines_mutex.release()
+        if log_level >= self.__target_log_level:
+            self.__prepare_and_print(self.__do_blank_line)
+
+    def log(self, log_level: LogLevel, originator: str, message, sticky=False, args: tuple = None):
+        """
+        The message can be a string, a %-style format string for args, or a callable returning the string.
+        Formats and callables are evaluated only if the log level is enabled.
+        """
+        cache = self.__originator_log_levels_cache
+        if cache is None:
+            target_log_level = self.__target_log_level
+        else:
+            target_log_level = cache.get(originator)
+            if target_log_level is None:
+                target_log_level = self.__get_target_log_level(cache, originator)
+
+        if log_level >= target_log_level:
+            now = self.__clock()  # Taken here to keep the caller's time when async
+            if self.__rate_limiter is None and not self.__flight_recorder:
+                message = render_message(message, args)
+                self.__prepare_and_print(self.__do_log, (log_level, originator, message, now, sticky),
+                                         droppable=not sticky and log_level != LogLevel.EPHEMERAL)
+            else:
+                operations, droppable = self.__get_log_operations(log_level, originator, message, args, now, sticky)
+                if len(operations) > 0:
+                    self.__submit(operations, droppable)
+        else:
+            if self.__flight_recorder is not None and not sticky and log_level != LogLevel.EPHEMERAL:
+                self.__flight_recorder.append((log_level, originator, message, args, self.__clock()))
+            if self.__stats is not None:
+                self.__stats.filtered[log_level] += 1
+
+    def log_many(self, records):
+        """
+        Log all the records at once, with a single repaint of the volatile lines and a single write.
+        Each record is a tuple (log_level, originator, message), optionally followed by sticky and args as in log().
+        """
+        now = self.__clock()
+        operations = []
+        droppable = True  # The batch can be dropped as a whole only if every operation in it can
+        for record in records:
+            log_level, originator, message = record[0], record[1], record[2]
+            sticky = record[3] if len(record) > 3 else False
+            args = record[4] if len(record) > 4 else None
+            if self.is_enabled(log_level, originator):
+                log_operations, log_droppable = self.__get_log_operations(log_level, originator, message, args, now,
+                                                                          sticky)
+                operations.extend(log_operations)
+                droppable = droppable and log_droppable
+            else:
+                if self.__flight_recorder is not None and not sticky and log_level != LogLevel.EPHEMERAL:
+                    self.__flight_recorder.append((log_level, originator, message, args, now))
+                if self.__stats is not None:
+                    self.__stats.filtered[log_level] += 1
+
+        if len(operations) > 0:
+            self.__submit(operations, droppable)
+
+    def __get_log_operations(self, log_level: LogLevel, originator: str, message, args: tuple, now: float,
+                             sticky: bool) -> tuple:
+        """
+        Return the operations printing the log, preceded by the flight recorder dump and the rate limit reports it
+        causes, and whether they can be dropped: only a permanent log on its own can.
+        """
+        operations = []
+        if self.__flight_recorder and log_level >= self.__flight_recorder_trigger_log_level:
+            operations.extend(self.__take_flight_recorder_operations())
+
+        allowed = True
+        if self.__rate_limiter is not None and not sticky and log_level != LogLevel.EPHEMERAL:
+            allowed, reports = self.__rate_limiter.check(log_level, originator, message, args, now)
+            for report_log_level, report_originator, report_message, report_time in reports:
+                operations.append((self.__do_log, (report_log_level, report_originator, report_message, report_time,
+                                                   False)))
+            if not allowed and self.__rate_limit_report_timer is None:
+                self.__schedule_rate_limit_report(self.__rate_limiter.report_interval)
+
+        droppable = len(operations) == 0 and not sticky and log_level != LogLevel.EPHEMERAL
+        if allowed:
+            message = render_message(message, args)
+            operations.append((self.__do_log, (log_level, originator, message, now, sticky)))
+        elif self.__stats is not None:
+            self.__stats.dropped[log_level] += 1
+        return operations, droppable
+
+    def set_rate_limit(self, rate: float, burst: int = None, collapse_duplicates: bool = True,
+                       report_interval: float = 5.0):
+        """
+        Limit each (originator, log level) pair to rate logs per second, allowing bursts of burst logs (by default
+        the rate itself), and collapse identical consecutive messages into a "repeated N times" report.
+        Suppressions are reported every report_interval seconds while they last, and once they have been quiet for
+        report_interval seconds. Sticky and ephemeral logs are not limited. Use rate 0 and collapse_duplicates False
+        to disable it.
+        """
+        self.__report_rate_limit()
+        if rate <= 0 and not collapse_duplicates:
+            self.__rate_limiter = None
+        else:
+            self.__rate_limiter = RateLimiter(rate, burst if burst is not None else max(1, int(rate)),
+                                              collapse_duplicates, report_interval)
+
+    def __report_rate_limit(self, quiet_interval: float = None):
+        """
+        Print the pending rate limit reports, or only those of the suppressions quiet for at least quiet_interval.
+        """
+        rate_limiter = self.__rate_limiter
+        if rate_limiter is not None:
+            now = self.__clock() if quiet_interval is not None else None
+            operations = [(self.__do_log, (log_level, originator, message, report_time, False))
+                          for log_level, originator, message, report_time
+                          in rate_limiter.take_pending_reports(now, quiet_interval)]
+            if len(operations) > 0:
+                self.__submit(operations, droppable=False)
+
+    def __schedule_rate_limit_report(self, delay: float):
+        self.__rate_limit_report_timer = Timer(delay, self.__report_quiet_rate_limits)
+        self.__rate_limit_report_timer.daemon = True
+        self.__rate_limit_report_timer.start()
+
+    def __report_quiet_rate_limits(self):
+        rate_limiter = self.__rate_limiter
+        self.__rate_limit_report_timer = None
+        if rate_limiter is not None:
+            self.__report_rate_limit(rate_limiter.report_interval)
+            if rate_limiter.has_pending_reports() and self.__rate_limit_report_timer is None:
+                self.__schedule_rate_limit_report(rate_limiter.report_interval)  # Some are still going on
+
+    def __cancel_rate_limit_report_timer(self):
+        rate_limit_report_timer = self.__rate_limit_report_timer
+        if rate_limit_report_timer is not None:
+            rate_limit_report_timer.cancel()
+            self.__rate_limit_report_timer = None
+
+    def set_flight_recorder(self, capacity: int, trigger_log_level: LogLevel = None):
+        """
+        Keep the last capacity logs filtered out by the target log level, unformatted, and print them right before the
+        next log of trigger_log_level (ERROR by default) or above, or when dump_flight_recorder() is called.
+        Sticky and ephemeral logs are not kept. Use 0 to disable it.
+        Lazy messages are evaluated only if printed, so their arguments are kept alive until then.
+        """
+        if trigger_log_level is None:
+            trigger_log_level = LogLevel.ERROR
+        self.__flight_recorder_trigger_log_level = trigger_log_level
+        self.__flight_recorder = deque(maxlen=capacity) if capacity > 0 else None
+
+    def dump_flight_recorder(self):
+        if self.__flight_recorder:
+            self.__submit(self.__take_flight_recorder_operations(), droppable=False)
+
+    def __take_flight_recorder_operations(self) -> list:
+        flight_recorder = self.__flight_recorder
+        entries = []
+        while True:  # popleft() is atomic, so nothing appended by other threads in the meantime gets lost
+            try:
+                entries.append(flight_recorder.popleft())
+            except IndexError:
+                break
+
+        return [(self.__do_log, (log_level, originator, render_recorded_message(message, args), now, False))
+                for log_level, originator, message, args, now in entries]
+
+    @contextmanager
+    def batch(self):
+        """
+        Everything printed by the current thread inside the `with` block is held back and printed at the end of the
+        block as if it was passed to log_many().
+        """
+        if getattr(self.__batch_local, "operations", None) is not None:
+            yield self  # Already inside a batch, the outer one will print everything
+            return
+
+        self.__batch_local.operations = []
+        try:
+            yield self
+        finally:
+            operations = self.__batch_local.operations
+            self.__batch_local.operations = None
+            if len(operations) > 0:
+                self.__submit(operations, droppable=False)
+
+    def print_raw(self, output: str):
+        """
+        Print output as it is above the sticky and ephemeral lines, only on the interactive sinks. Any line it starts
+        must be ended, or the volatile lines will be drawn after it.
+        """
+        if output != "":
+            self.__prepare_and_print(output)
+
+    def redirect_stdout(self):
+        """
+        Replace sys.stdout with a stream printing everything written to it through print_raw(), so that stray print()
+        calls do not break the sticky and ephemeral lines. The terminal sinks keep writing to the real stdout.
+        """
+        if self.__redirected_stdout is not None:
+            return
+
+        with self.__print_mutex:
+            self.__redirected_stdout = RedirectedStream(sys.stdout, self.print_raw)
+            self.__sinks = [self.__get_sink_bound_to_stdout(sink) for sink in self.__sinks]
+            sys.stdout = self.__redirected_stdout
+
+    def __get_sink_bound_to_stdout(self, sink: Sink) -> Sink:
+        """
+        While stdout is redirected, return a replacement writing to the real stdout for a terminal sink that would
+        write back into the redirection, and deadlock on the print mutex. Must be called holding the print mutex.
+        """
+        redirected_stdout = self.__redirected_stdout
+        if redirected_stdout is None or not isinstance(sink, TerminalSink) or \
+                (sink.stream is not None and sink.stream is not redirected_stdout):
+            return sink
+        replacement = TerminalSink(redirected_stdout.original, sink.output_format)
+        self.__stdout_replaced_sinks[replacement] = sink
+        return replacement
+
+    def restore_stdout(self):
+        """
+        Print what is still held back by the redirection and put the real stdout back.
+        """
+        redirected_stdout = self.__redirected_stdout
+        if redirected_stdout is None:
+            return
+
+        redirected_stdout.flush()
+        with self.__print_mutex:
+            if sys.stdout is redirected_stdout:
+                sys.stdout = redirected_stdout.original
+            self.__sinks = [self.__stdout_replaced_sinks.get(sink, sink) for sink in self.__sinks]
+            self.__stdout_replaced_sinks = {}
+            self.__redirected_stdout = None
 
     def remove_sticky(self):
         self.__prepare_and_print(self.__do_remove_sticky)
@@ -68,12 +536,11 @@ class Loggerz(metaclass=Singleton):
     def remove_ephemerals(self):
         self.__prepare_and_print(self.__do_remove_ephemerals)
 
-    def __do_log(self, log_level: LogLevel, originator: str, message: str, sticky: bool) -> str:
-        output = ""
-        now = datetime.now().strftime('%H:%M:%S.%f')[:-3]
-        new_log = Loggerz.Logz(log_level, originator, message, now, sticky)
+    def __do_log(self, log_level: LogLevel, originator: str, message: str, now: float, sticky: bool) -> Logz:
+        return self.__do_add_log(Loggerz.Logz(log_level, originator, message, now, sticky))
 
-        if sticky:
+    def __do_add_log(self, new_log: Logz) -> Logz:
+        if new_log.sticky:
             self.current_sticky_message = new_log  # Do not print but store for later
         elif new_log.log_level == LogLevel.EPHEMERAL:
             self.ephemeral_logs.append(new_log)  # Do not print but store for later
@@ -81,9 +548,11 @@ class Loggerz(metaclass=Singleton):
                 self.ephemeral_logs.popleft()
         else:
             self.ephemeral_logs.clear()  # Any new non-ephemeral log removes all the previous ephemerals
-            output += self.__build_log(new_log)  # To be printed
 
-        return output
+        return new_log
+
+    def __do_blank_line(self) -> str:
+        return "\n"
 
     def __do_remove_sticky(self):
         self.current_sticky_message = None
@@ -91,119 +560,729 @@ class Loggerz(metaclass=Singleton):
     def __do_remove_ephemerals(self):
         self.ephemeral_logs.clear()
 
-    def __should_be_logged(self, log_level: LogLevel) -> bool:
-        return log_level >= self.target_log_level
-
-    def __prepare_and_print(self, fun_to_call_or_output, args=None):
+    def __prepare_and_print(self, fun_to_call_or_output, args=None, droppable=False):
+        self.__submit([(fun_to_call_or_output, args)], droppable)
+
+    def __submit(self, operations: list, droppable: bool):
+        batch_operations = getattr(self.__batch_local, "operations", None)
+        async_queue = self.__async_queue
+        if batch_operations is not None:
+            batch_operations.extend(operations)
+        elif self.__log_server_queue is not None:
+            self.__log_server_queue.put([self.__to_message(operation) for operation in operations])
+        elif async_queue is not None:
+            self.__enqueue(async_queue, operations, droppable)
+        else:
+            self.__prepare_and_print_many(operations)
+
+    def __prepare_and_print_many(self, operations):
+        stats = self.__stats
+        if stats is not None:
+            start = perf_counter()
+
+        # Build the logs in the calling thread, for the terminal and for every format the other sinks need, only what
+        # touches the volatile lines and the order of the output is serialized
+        do_log = self.__do_log
+        do_blank_line = self.__do_blank_line
+        colors_enabled = self.__colors_enabled
+        timestamp_format = self.__get_timestamp_format()
+        prepared_operations = []  # (function to call or None, its args, output for the interactive sinks or None)
+        logs_and_blank_lines = []  # For the sinks that need them formatted differently
+        for fun_to_call_or_output, args in operations:
+            if fun_to_call_or_output == do_log:
+                new_log = Loggerz.Logz(*args)
+                built_log = None if new_log.is_volatile() else self.__build_log(new_log, colors_enabled,
+                                                                                 timestamp_format)
+                prepared_operations.append((self.__do_add_log, (new_log,), built_log))
+                logs_and_blank_lines.append(new_log)
+            elif fun_to_call_or_output == do_blank_line:
+                blank_line = do_blank_line()
+                prepared_operations.append((None, None, blank_line))
+                logs_and_blank_lines.append(blank_line)
+            elif callable(fun_to_call_or_output):
+                prepared_operations.append((fun_to_call_or_output, args, None))
+            else:
+                prepared_operations.append((None, None, fun_to_call_or_output))  # Terminal only
+        sink_outputs = self.__build_sink_outputs(logs_and_blank_lines)
+
+        if stats is not None:
+            stats.build_time += perf_counter() - start
+            start = perf_counter()
+        with self.__volatile_lines_mutex:
+            if stats is not None:
+                stats.volatile_lines_lock_wait_time += perf_counter() - start
+            do_add_log = self.__do_add_log
+            output = ""
+            only_volatile_updates = True  # Sticky and ephemeral logs can wait for the next repaint
+
+            for fun_to_call, args, built_output in prepared_operations:
+                if fun_to_call is None:
+                    only_volatile_updates = False
+                elif fun_to_call == do_add_log:
+                    fun_to_call(*args)
+                    if stats is not None:
+                        stats.logged[args[0].log_level] += 1
+                elif args is None:
+                    only_volatile_updates = False
+                    fun_to_call()
+                else:
+                    only_volatile_updates = False
+                    fun_to_call(*args)
+                if built_output is not None:
+                    output += built_output
+
+            if only_volatile_updates and output == "" and not self.__is_repaint_due():
+                self.__schedule_repaint()
+                self.__print("", logs_and_blank_lines, sink_outputs)  # The volatile logs still reach the JSONL sinks
+            else:
+                self.__print(self.__repaint_volatile_lines_as_string(output, stats), logs_and_blank_lines,
+                             sink_outputs)
+
+    def __print(self, output: str, logs_and_blank_lines: list = None, sink_outputs: dict = None):
+        """
+        Write output to the interactive sinks, and logs_and_blank_lines to the others as found in sink_outputs (see
+        __build_sink_outputs()), building only what is missing there, e.g. for a sink added in the meantime.
+        """
+        stats = self.__stats
+        if stats is not None:
+            start = perf_counter()
+        with self.__print_mutex:
+            if stats is not None:
+                stats.print_lock_wait_time += perf_counter() - start
+
+            formatted_outputs = sink_outputs if sink_outputs is not None else {}
+            for sink in self.__sinks:
+                output_format = sink.output_format if sink.output_format is not None else self.__output_format
+                if output_format == Format.TEXT and sink.interactive:
+                    if output != "":
+                        self.__write(stats, sink, output)
+                elif logs_and_blank_lines:
+                    key = (output_format, sink.timestamp_format)
+                    sink_output = formatted_outputs.get(key)
+                    if sink_output is None:
+                        sink_output = self.__build_sink_output(logs_and_blank_lines, output_format,
+                                                               sink.timestamp_format)
+                        formatted_outputs[key] = sink_output
+                    if sink_output != "":
+                        self.__write(stats, sink, sink_output)
+
+    def __build_sink_outputs(self, logs_and_blank_lines: list) -> dict:
+        """
+        Return the output of the sinks that are not interactive by (output format, timestamp format), as sinks asking
+        for the same formats share the same output.
+        """
+        sink_outputs = {}
+        if logs_and_blank_lines:
+            for sink in self.__sinks:
+                output_format = sink.output_format if sink.output_format is not None else self.__output_format
+                key = (output_format, sink.timestamp_format)
+                if not (output_format == Format.TEXT and sink.interactive) and key not in sink_outputs:
+                    sink_outputs[key] = self.__build_sink_output(logs_and_blank_lines, output_format,
+                                                                 sink.timestamp_format)
+        return sink_outputs
+
+    def __build_sink_output(self, logs_and_blank_lines: list, output_format: Format,
+                            timestamp_format: TimestampFormat) -> str:
+        if output_format == Format.JSONL:
+            return self.__build_json_output(logs_and_blank_lines, timestamp_format)
+        return self.__build_plain_output(logs_and_blank_lines, timestamp_format if timestamp_format is not None
+                                         else self.__get_timestamp_format())
+
+    def __write(self, stats: Stats, sink: Sink, output: str):
+        """
+        Write output to sink, reporting a failure instead of raising it, so that one broken sink (e.g. a full disk)
+        neither stops the others nor leaves the locks held.
+        """
+        try:
+            if stats is None:
+                sink.write(output)
+            else:
+                start = perf_counter()
+                sink.write(output)
+                stats.write_time += perf_counter() - start
+                stats.bytes_written += len(output) if output.isascii() else _get_encoded_size(sink, output)
+        except Exception:
+            _report_error(f"{type(sink).__name__} failed to write")
+
+    def __build_plain_output(self, logs_and_blank_lines: list, timestamp_format: TimestampFormat) -> str:
         output = ""
-        output += self.__delete_volatile_lines_as_string()
+        for log_or_output in logs_and_blank_lines:
+            if not isinstance(log_or_output, Loggerz.Logz):
+                output += log_or_output
+            elif not log_or_output.is_volatile():
+                output += self.__build_log(log_or_output, False, timestamp_format)
+        return output
 
-        if callable(fun_to_call_or_output):
-            result = fun_to_call_or_output() if args is None else fun_to_call_or_output(*args)  # TODO change me
-            if result is not None:
-                output += result
+    def __build_json_output(self, logs_and_blank_lines: list, timestamp_format: TimestampFormat) -> str:
+        lines = []
+        formatter = self.__timestamp_formatters[timestamp_format] if timestamp_format is not None else None
+        for log in logs_and_blank_lines:
+            if isinstance(log, Loggerz.Logz):  # Blank lines have no meaning here
+                formatted_time = f'"time":"{formatter.format(log.timestamp)}",' if formatter is not None else ""
+                lines.append(
+                    f'{{"timestamp":{log.timestamp!r},{formatted_time}"level":{_JSON_LEVEL_NAMES[log.log_level]},'
+                    f'"originator":{encode_basestring(log.originator)},"message":{encode_basestring(log.message)},'
+                    f'"sticky":{"true" if log.sticky else "false"}}}\n'
+                )
+        return "".join(lines)
+
+    def set_output_format(self, output_format: Format):
+        """
+        Choose the format written to the sinks that do not specify one.
+        """
+        self.__output_format = output_format
+
+    def __is_repaint_due(self) -> bool:
+        return monotonic() - self.__last_repaint_time >= self.__min_repaint_interval
+
+    def __schedule_repaint(self):
+        self.__repaint_pending = True
+        if self.__repaint_timer is None:
+            delay = max(self.__min_repaint_interval - (monotonic() - self.__last_repaint_time), 0.0)
+            event_loop = self.__event_loop
+            if event_loop is not None:
+                try:
+                    # The loop only hands the repaint back to the writer thread, it never prints
+                    self.__repaint_timer = _EventLoopTimer(event_loop, delay, self.__hand_off_repaint)
+                    return
+                except RuntimeError:
+                    pass  # The loop is already closed, e.g. left without detach_event_loop()
+            self.__repaint_timer = Timer(delay, self.__repaint_if_pending)
+            self.__repaint_timer.daemon = True
+            self.__repaint_timer.start()
+
+    def __repaint_if_pending(self):
+        with self.__volatile_lines_mutex:
+            self.__repaint_timer = None
+            if self.__repaint_pending:
+                self.__print(self.__repaint_volatile_lines_as_string("", self.__stats))
+
+    def __hand_off_repaint(self):
+        self.__prepare_and_print(self.__do_repaint)
+
+    def __do_repaint(self):
+        self.__repaint_timer = None  # The volatile lines are repainted like after any operation that is not a log
+
+    def __cancel_repaint_timer(self):
+        with self.__volatile_lines_mutex:
+            if self.__repaint_timer is not None:
+                self.__repaint_timer.cancel()
+                self.__repaint_timer = None
+
+    def set_stats_enabled(self, stats_enabled: bool):
+        """
+        Start collecting how many logs are printed, filtered out and dropped, how much is written and where the time
+        goes. Enabling it again starts from zero. Counters updated outside the locks, like the filtered logs, are
+        best effort when many threads log at once.
+        """
+        self.__stats = Stats(_LOG_LEVELS) if stats_enabled else None
+
+    def stats(self) -> dict:
+        """
+        Return a snapshot of what has been collected since set_stats_enabled(True), or None when disabled.
+        """
+        stats = self.__stats
+        return stats.snapshot() if stats is not None else None
+
+    def set_max_refresh_rate(self, max_refresh_rate: float):
+        """
+        Limit how many times per second the sticky and ephemeral lines are repainted. Updates arriving in between are
+        merged and only the latest state is drawn. Use 0 to repaint on every update.
+        """
+        self.__min_repaint_interval = 1.0 / max_refresh_rate if max_refresh_rate > 0 else 0.0
+
+    def set_async_mode(self, async_mode: bool, queue_size: int = 1024, queue_policy: QueuePolicy = QueuePolicy.BLOCK):
+        """
+        When enabled, log() only enqueues the log and returns, while a dedicated writer thread formats and prints
+        the enqueued logs in batches. Use queue_policy to choose what happens when more than queue_size logs are
+        waiting to be printed.
+        """
+        self.__stop_async_writer()
+        if async_mode:
+            self.__async_queue_size = queue_size
+            self.__async_queue_policy = queue_policy
+            self.__async_queue = _WriterQueue(queue_size)
+            self.__async_writer = Thread(target=self.__async_writer_loop, args=(self.__async_queue,),
+                                         name="LoggerzWriter", daemon=True)
+            self.__async_writer.start()
+            atexit.register(self.flush)
+
+    def get_dropped_logs_count(self) -> int:
+        return self.__async_dropped_logs
+
+    def __enqueue(self, async_queue: _WriterQueue, operations: list, droppable: bool):
+        if droppable and self.__async_queue_policy == QueuePolicy.DROP:
+            try:
+                async_queue.put_nowait(operations)
+            except Full:
+                self.__async_dropped_logs += len(operations)
+                stats = self.__stats
+                if stats is not None:
+                    for _, args in operations:  # Only logs are droppable
+                        stats.dropped[args[0]] += 1
         else:
-            output += fun_to_call_or_output
+            async_queue.put(operations)  # Never drop anything that changes the volatile lines
+
+        if self.__async_queue is not async_queue:  # Stopped meanwhile, the writer may have exited already
+            async_queue.writer_exited.wait()
+            self.__print_leftovers(async_queue)
+
+    def __print_leftovers(self, async_queue: _WriterQueue):
+        operations = []
+        while True:
+            try:
+                item = async_queue.get_nowait()
+            except Empty:
+                break
+            if item is not None:
+                operations.extend(item)
+            async_queue.task_done()
+
+        if len(operations) > 0:
+            self.__prepare_and_print_many(operations)
+
+    def __stop_async_writer(self):
+        if self.__async_queue is not None:
+            async_queue = self.__async_queue
+            self.__async_queue = None  # From now on print synchronously
+            async_queue.put(None)  # Wake up the writer and tell it to exit once the queue is drained
+            self.__async_writer.join()
+            self.__async_writer = None
+            self.__print_leftovers(async_queue)  # Enqueued after the exit by those that were already enqueuing
+            atexit.unregister(self.flush)
+
+    def __async_writer_loop(self, async_queue: _WriterQueue):
+        stop = False
+        while not stop:
+            enqueued = [async_queue.get()]
+            while len(enqueued) < self.__async_batch_size:  # Take everything that is ready, up to a batch
+                try:
+                    enqueued.append(async_queue.get_nowait())
+                except Empty:
+                    break
+
+            taken = len(enqueued)
+            operations = []
+            for item in enqueued:
+                if item is None:
+                    stop = True
+                else:
+                    operations.extend(item)
+
+            try:
+                if len(operations) > 0:
+                    self.__prepare_and_print_many(operations)
+            except Exception:
+                _report_error("the writer thread failed to print a batch")  # Keep going, or flush() would hang
+            finally:
+                for _ in range(taken):
+                    async_queue.task_done()
+        async_queue.writer_exited.set()
+
+    def attach_event_loop(self, loop: asyncio.AbstractEventLoop = None, non_blocking_stdout: bool = False,
+                          max_pending: int = 1024):
+        """
+        Print from a writer thread while loop (the running one by default) runs, so that a slow terminal or a full
+        pipe never blocks it: log() only enqueues, without any limit, while alog() and drain() also wait as long as
+        more than max_pending logs are waiting to be printed. The repaints of the volatile lines are timed by loop.
+        The async mode chosen with set_async_mode() is replaced until detach_event_loop().
+        With non_blocking_stdout the terminal sinks writing to stdout are replaced by a NonBlockingStreamSink, so that
+        the writer thread does not wait for a full pipe either. Use it only when nothing else writes to the same pipe
+        while attached: the non-blocking mode belongs to the open pipe, shared with print(), with stderr when
+        redirected to it (`2>&1`) and with every other process writing to it, and their writes would silently lose
+        what does not fit. It is always skipped when stdout is a terminal, where the same writes would fail with
+        BlockingIOError.
+        """
+        self.detach_event_loop()
+        loop = loop if loop is not None else asyncio.get_running_loop()
+
+        self.__event_loop_async_mode = (self.__async_queue_size, self.__async_queue_policy) \
+            if self.__async_queue is not None else None
+        self.set_async_mode(True, queue_size=0)  # Unbounded, the loop must never wait for room in the queue
+
+        stdout_fd = None
+        if non_blocking_stdout:
+            self.__async_queue.join()  # What has already been printed must come first
+            sys.stdout.flush()
+            stdout_fd = _get_file_descriptor(sys.stdout)
+            if stdout_fd is not None and os.isatty(stdout_fd):
+                stdout_fd = None
+        with self.__print_mutex:
+            if stdout_fd is not None:
+                sinks = []
+                for sink in self.__sinks:
+                    if isinstance(sink, TerminalSink) and \
+                            (sink.stream is None or _get_file_descriptor(sink.stream) == stdout_fd):
+                        replacement = NonBlockingStreamSink(stdout_fd, loop, output_format=sink.output_format)
+                        self.__event_loop_replaced_sinks[replacement] = sink
+                        sink = replacement
+                    sinks.append(sink)
+                self.__sinks = sinks
+            self.__event_loop_max_pending = max_pending
+            self.__event_loop = loop
+
+    def detach_event_loop(self):
+        """
+        Print what is still enqueued and go back to the async mode in use before attach_event_loop().
+        """
+        if self.__event_loop is not None:
+            self.__event_loop = None
+            async_mode = self.__event_loop_async_mode
+            self.__event_loop_async_mode = None
+            self.__stop_async_writer()
+
+            with self.__print_mutex:
+                if len(self.__event_loop_replaced_sinks) > 0:
+                    sinks = []
+                    for sink in self.__sinks:
+                        replaced_sink = self.__event_loop_replaced_sinks.get(sink)
+                        if replaced_sink is not None:
+                            try:
+                                sink.close()
+                            except Exception:
+                                _report_error(f"{type(sink).__name__} failed to close")
+                            sink = replaced_sink
+                        sinks.append(sink)
+                    self.__sinks = sinks
+                    self.__event_loop_replaced_sinks = {}
+
+            # A repaint scheduled on the loop may never run once it is closed, and would block any further one
+            with self.__volatile_lines_mutex:
+                if isinstance(self.__repaint_timer, _EventLoopTimer):
+                    self.__repaint_timer.cancel()
+                    self.__repaint_timer = None
+                    if self.__repaint_pending:
+                        self.__print(self.__repaint_volatile_lines_as_string("", self.__stats))
+
+            if async_mode is not None:
+                self.set_async_mode(True, *async_mode)
+
+    async def alog(self, log_level: LogLevel, originator: str, message, sticky=False, args: tuple = None):
+        """
+        Like log(), then wait while the writer thread or the sinks are too far behind, see drain().
+        """
+        self.log(log_level, originator, message, sticky, args)
+        await self.drain()
+
+    async def drain(self):
+        """
+        Wait while more than the max_pending logs of attach_event_loop() are waiting for the writer thread, then
+        while a sink has too much output waiting to be written.
+        """
+        async_queue = self.__async_queue
+        if self.__event_loop is not None and async_queue is not None:
+            await async_queue.wait_for_writer(self.__event_loop_max_pending)
+        for sink in self.__sinks:
+            await sink.drain()
+
+    def start_log_server(self) -> multiprocessing.Queue:
+        """
+        Make this process the only one that formats and prints logs. The returned queue has to be given to
+        connect_to_log_server() in every other process, e.g. as ProcessPoolExecutor(initializer=..., initargs=(queue,)).
+        """
+        if self.__log_server_listener is None:
+            log_server_queue = multiprocessing.Queue()
+            self.__log_server_listener = Thread(target=self.__log_server_loop, args=(log_server_queue,),
+                                                name="LoggerzLogServer", daemon=True)
+            self.__log_server_listener.start()
+            self.__log_server_listener_queue = log_server_queue
+        return self.__log_server_listener_queue
+
+    def stop_log_server(self):
+        """
+        Print everything that has already been sent by the other processes, then stop listening.
+        """
+        if self.__log_server_listener is not None:
+            self.__log_server_listener_queue.put(None)
+            self.__log_server_listener.join()
+            self.__log_server_listener = None
+            self.__log_server_listener_queue = None
+
+    def connect_to_log_server(self, log_server_queue: multiprocessing.Queue):
+        """
+        Send the logs of this process to the process that called start_log_server(). Levels are still filtered here,
+        with the settings of this process, so that nothing useless is sent.
+        """
+        # Locks are inherited by a forked child as they were, possibly held by a thread of the parent that does not
+        # exist here, e.g. the listener while printing
+        self.__print_mutex = Lock()
+        self.__volatile_lines_mutex = Lock()
 
-        output += self.__write_volatile_lines_as_string()
+        self.__async_queue = None  # Threads are not inherited by a forked child
+        self.__async_writer = None
+        self.__repaint_timer = None  # Nor are the timers
+        self.__rate_limit_report_timer = None
+        self.__event_loop = None  # Nor is the event loop running
+        self.__event_loop_async_mode = None
+        self.__event_loop_replaced_sinks = {}
+        self.__log_server_listener = None  # Nor is the listener, stop_log_server() must not stop the parent's one
+        self.__log_server_listener_queue = None
+
+        # Start from scratch what the parent would otherwise report or dump twice, and the lock of the rate limiter
+        rate_limiter = self.__rate_limiter
+        if rate_limiter is not None:
+            self.__rate_limiter = RateLimiter(rate_limiter.rate, rate_limiter.burst, rate_limiter.collapse_duplicates,
+                                              rate_limiter.report_interval)
+        if self.__flight_recorder is not None:
+            self.__flight_recorder.clear()
+
+        self.__sinks = []  # Everything is printed by the server, flushing copied buffers here would print them twice
+        self.__log_server_queue = log_server_queue
+
+    def __to_message(self, operation) -> tuple:
+        fun_to_call_or_output, args = operation
+        if not callable(fun_to_call_or_output):
+            return _OPERATION_OUTPUT, fun_to_call_or_output
+        elif args is None:
+            return self.__operation_codes[fun_to_call_or_output],
+        else:
+            log_level, originator, message, now, sticky = args
+            return _OPERATION_LOG, int(log_level), originator, message, now, sticky
+
+    def __from_message(self, message: tuple):
+        operation_code = message[0]
+        if operation_code == _OPERATION_LOG:
+            _, log_level, originator, log_message, now, sticky = message
+            return self.__do_log, (_LOG_LEVELS[log_level], originator, log_message, now, sticky)
+        elif operation_code == _OPERATION_BLANK_LINE:
+            return self.__do_blank_line, None
+        elif operation_code == _OPERATION_REMOVE_STICKY:
+            return self.__do_remove_sticky, None
+        elif operation_code == _OPERATION_REMOVE_EPHEMERALS:
+            return self.__do_remove_ephemerals, None
+        else:
+            return message[1], None
+
+    def __log_server_loop(self, log_server_queue: multiprocessing.Queue):
+        stop = False
+        while not stop:
+            received = [log_server_queue.get()]
+            while len(received) < self.__async_batch_size:  # Merge what the processes have sent in the meantime
+                try:
+                    received.append(log_server_queue.get_nowait())
+                except Empty:
+                    break
+
+            operations = []
+            for messages in received:
+                if messages is None:
+                    stop = True
+                else:
+                    operations.extend(self.__from_message(message) for message in messages)
+
+            if len(operations) > 0:
+                self.__submit(operations, droppable=False)
+
+    def __repaint_volatile_lines_as_string(self, output: str, stats: Stats) -> str:
+        """
+        Return output preceded by the erasure of the volatile lines on the screen and followed by their new version.
+        """
+        if stats is None:
+            return self.__build_repaint_as_string(output)
+
+        start = perf_counter()
+        output = self.__build_repaint_as_string(output)
+        stats.repaint_time += perf_counter() - start
+        return output
 
-        self.__print_mutex.acquire()
-        print(output, end="")
-        self.__print_mutex.release()
+    def __build_repaint_as_string(self, output: str) -> str:
+        if output != "":  # The new output takes the place of the volatile lines, which are then drawn again below it
+            output = self.__delete_volatile_lines_as_string() + output
+        return output + self.__write_volatile_lines_as_string()
 
     def __delete_volatile_lines_as_string(self) -> str:
-        output = ""
-        if self.__terminal_movements_enabled:
-            erase_next_n_lines = 0
-
-            # Ephemeral logs
-            for logger_message in self.ephemeral_logs:
-                erase_next_n_lines += 1
-                for i in range(1, logger_message.get_number_of_lines()):  # Account for multiline
-                    erase_next_n_lines += 1
-
-            # Sticky log
-            if self.current_sticky_message is not None:
-                erase_next_n_lines += 1
-                for i in range(1, self.current_sticky_message.get_number_of_lines()):
-                    erase_next_n_lines += 1
-
-            output = erase_next_n_lines_and_rewind_as_string(erase_next_n_lines)
-
+        # Erase what has been drawn, the current volatile lines may not have been painted yet
+        output = TerminalMovements.ERASE_SCREEN_FORWARD if len(self.__drawn_volatile_frame) > 0 else ""
+        self.__drawn_volatile_frame = []
         return output
 
     def __write_volatile_lines_as_string(self) -> str:
+        """
+        Draw the volatile lines below the cursor and rewind, rewriting only the lines that differ from the ones
+        already on the screen.
+        """
+        frame = self.__build_volatile_frame() if self.__terminal_movements_enabled else []
+        drawn_frame = self.__drawn_volatile_frame
+        output = []
+        skipped_lines = 0  # Unchanged lines to move past before writing the next changed one
+        moved_lines = 0
+        for i, line in enumerate(frame):
+            if i < len(drawn_frame) and drawn_frame[i] == line:
+                skipped_lines += 1
+                continue
+
+            output.append(TerminalUtils.get_move_cursor_down_as_string(skipped_lines))
+            if i < len(drawn_frame):
+                output.append(TerminalMovements.ERASE_LINE_FORWARD)
+            output.append(line)
+            output.append("\n")
+            moved_lines += skipped_lines + 1
+            skipped_lines = 0
+
+        if len(drawn_frame) > len(frame):  # Erase the lines left over from the previous frame
+            output.append(TerminalUtils.get_move_cursor_down_as_string(skipped_lines))
+            output.append(TerminalMovements.ERASE_SCREEN_FORWARD)
+            moved_lines += skipped_lines
+
+        output.append(TerminalUtils.get_move_cursor_up_as_string(moved_lines))
+        self.__drawn_volatile_frame = frame
+        self.__repaint_pending = False
+        self.__last_repaint_time = monotonic()
+        return "".join(output)
+
+    def __build_volatile_frame(self) -> list:
+        """
+        Return the ephemeral logs and the sticky log as they are drawn, one string per line on the screen.
+        """
         output = ""
-        if self.__terminal_movements_enabled:
-            rewind_lines = 0
-
-            # Ephemeral logs
-            for log in self.ephemeral_logs:
-                output += self.__build_log(log)
-                rewind_lines += log.get_number_of_lines()
-
-            # Sticky log
-            if self.current_sticky_message is not None:
-                output += self.__build_log(self.current_sticky_message)
-                rewind_lines += self.current_sticky_message.get_number_of_lines()
+        for log in self.ephemeral_logs:
+            output += self.__build_log(log, self.__colors_enabled, self.__get_timestamp_format())
+        if self.current_sticky_message is not None:
+            output += self.__build_log(self.current_sticky_message, self.__colors_enabled,
+                                       self.__get_timestamp_format())
+        return output.split("\n")[:-1]  # Every log ends with \n
 
-            output += TerminalUtils.get_move_cursor_up_as_string(rewind_lines)
-
-        return output
-
-    def __build_log(self, log: Logz) -> str:
-        output = ""
-        prefix_symbol = ""
-        prefix_info = ""
+    def __build_log(self, log: Logz, colors_enabled: bool, timestamp_format: TimestampFormat) -> str:
+        templates = self.__log_templates if colors_enabled else self.__plain_log_templates
+        head, prefix_symbol_length, newline_reset, newline_color, tail = templates[log.log_level, log.sticky]
 
         # Prefix
-        if not log.sticky:  # Don't print the prefix when sticky
-            prefix_symbol += "[" + self.__get_log_prefix_as_string(log.log_level) + "]"
-
-            if self.__print_timestamp:
-                prefix_info += " "
-                prefix_info += log.timestamp
-
-            prefix_info += " ["
-            prefix_info += log.originator.ljust(self.__originator_width, " ")
-            prefix_info += "] "
+        if log.sticky:  # Don't print the prefix when sticky
+            prefix_info = ""
+        elif timestamp_format is not None:
+            timestamp = self.__timestamp_formatters[timestamp_format].format(log.timestamp)
+            prefix_info = " " + timestamp + " [" + log.originator.ljust(self.__originator_width, " ") + "] "
+        else:
+            prefix_info = " [" + log.originator.ljust(self.__originator_width, " ") + "] "
 
         # Message
-        message = self.__add_pad_after_endline(log.message, len(prefix_symbol) + len(prefix_info), log.sticky)
+        prefix_length = prefix_symbol_length + get_display_width(prefix_info)
+        columns = None
         if log.sticky or log.log_level == LogLevel.EPHEMERAL:
-            max_line_length, _ = shutil.get_terminal_size()
+            max_line_length = self.__terminal_size.get_size().columns
             if max_line_length <= 0:
                 max_line_length = 80
-            message = self.__shorten_line(message, max_line_length - len(prefix_symbol) - len(prefix_info))
-        if message.count('\n') > 0:
-            message = self.__re_add_color_string_after_endline(message, log.log_level, log.sticky)
+            columns = max_line_length - prefix_length
+        message = self.__format_message(log.message, prefix_length, log.sticky, columns, newline_reset, newline_color)
 
         # All together
-        if log.sticky:
-            output += "\n"  # Always put a blank before a sticky
-        output += self.__get_color_string_for(log.log_level, log.sticky, True)
-        output += prefix_symbol
-        output += self.__get_color_reset_string_for(log.log_level, log.sticky, True)
-        output += prefix_info
-        output += message
-        output += self.__get_color_reset_string_for(log.log_level, log.sticky, False)
-        output += "\n"
-
-        return output
+        return "".join((head, prefix_info, message, tail))
+
+    def __build_log_templates(self):
+        """
+        Precompute everything that only depends on the log level, whether the log is sticky and the settings, so that
+        building a log is a single lookup.
+        """
+        log_templates = {}
+        plain_log_templates = {}
+        for log_level in LogLevel:
+            for sticky in (False, True):
+                log_templates[log_level, sticky] = self.__build_log_template(log_level, sticky, self.__colors_enabled)
+                plain_log_templates[log_level, sticky] = self.__build_log_template(log_level, sticky, False)
+
+        self.__log_templates = log_templates
+        self.__plain_log_templates = plain_log_templates
+
+    def __build_log_template(self, log_level: LogLevel, sticky: bool, colors_enabled: bool) -> tuple:
+        prefix_symbol = "" if sticky else "[" + self.__get_log_prefix_as_string(log_level) + "]"
+        head = ("\n" if sticky else "")  # Always put a blank before a sticky
+        head += self.__get_color_string_for(log_level, sticky, True, colors_enabled)
+        head += prefix_symbol
+        head += self.__get_color_reset_string_for(log_level, sticky, True, colors_enabled)
+
+        newline_reset = self.__get_color_reset_string_for(log_level, sticky, False, colors_enabled)
+        newline_color = self.__get_color_string_for(log_level, sticky, False, colors_enabled)
+        tail = self.__get_color_reset_string_for(log_level, sticky, False, colors_enabled) + "\n"
+
+        return head, len(prefix_symbol), newline_reset, newline_color, tail
 
     def set_target_log_level(self, target_log_level: LogLevel):
         if target_log_level >= LogLevel.EPHEMERAL:
-            self.target_log_level = target_log_level
+            self.__target_log_level = target_log_level
+            self.__invalidate_originator_log_levels_cache()
+
+    def set_originator_log_level(self, originator: str, target_log_level: LogLevel):
+        """
+        Override the target log level for originator and for the originators below it, e.g. `db` also applies to
+        `db.pool` unless `db.pool` has its own. Use None to remove the override.
+        """
+        if target_log_level is None:
+            self.__originator_log_levels.pop(originator, None)
+        elif target_log_level >= LogLevel.EPHEMERAL:
+            self.__originator_log_levels[originator] = target_log_level
+        self.__invalidate_originator_log_levels_cache()
+
+    def clear_originator_log_levels(self):
+        self.__originator_log_levels = {}
+        self.__invalidate_originator_log_levels_cache()
+
+    def load_log_levels_from_file(self, path: str):
+        """
+        Apply the target log levels listed in the file, one `originator = LEVEL` per line (see parse_log_levels()).
+        The overrides of the originators replace the previous ones, so that loading the file again after editing it
+        also drops the removed entries. The target log level is changed only if `*` is listed.
+        """
+        with open(path, encoding="utf-8") as file:
+            self.__apply_log_levels(parse_log_levels(file.read()), replace=True)
+
+    def load_log_levels_from_env(self, variable: str = "LOGGERZ_LOG_LEVELS"):
+        """
+        Apply the target log levels in the environment variable, e.g. `*=INFO,db=DEBUG,db.pool=WARNING`, on top of
+        the overrides already set.
+        """
+        self.__apply_log_levels(parse_log_levels(os.environ.get(variable, ""), ","))
+
+    def __apply_log_levels(self, log_levels: dict, replace: bool = False):
+        originator_log_levels = {} if replace else dict(self.__originator_log_levels)
+        for originator, target_log_level in log_levels.items():
+            if originator == "*":
+                self.set_target_log_level(target_log_level)
+            else:
+                originator_log_levels[originator] = target_log_level
+        self.__originator_log_levels = originator_log_levels  # Swapped at once, like the cache
+        self.__invalidate_originator_log_levels_cache()
+
+    def __invalidate_originator_log_levels_cache(self):
+        # Swapped at once, so readers always see either the old or the new cache
+        self.__originator_log_levels_cache = {} if len(self.__originator_log_levels) > 0 else None
+
+    def __get_target_log_level(self, cache: dict, originator: str) -> LogLevel:
+        target_log_level = cache.get(originator)
+        if target_log_level is None:
+            target_log_level = self.__target_log_level
+            name = originator
+            while True:  # From the most specific prefix to the least one
+                if name in self.__originator_log_levels:
+                    target_log_level = self.__originator_log_levels[name]
+                    break
+                dot = name.rfind(".")
+                if dot < 0:
+                    break
+                name = name[0:dot]
+
+            if len(cache) >= _MAX_CACHED_ORIGINATORS:
+                cache.clear()  # Originators built on the fly must not grow it forever
+            cache[originator] = target_log_level
+        return target_log_level
 
     def set_long_prefix(self, long_prefix: bool):
-        self.long_prefix = long_prefix
+        self.__long_prefix = long_prefix
+        self.__build_log_templates()
 
     def set_originator_width(self, originator_width: int):
-        self.originator_width = originator_width
+        self.__originator_width = originator_width
 
     def set_max_ephemeral_messages(self, max_ephemeral_messages: int):
         self.max_ephemeral_messages = max_ephemeral_messages
 
+    def set_terminal_size_poll_interval(self, poll_interval: float):
+        """
+        How often the terminal size is read again when it cannot be updated on resize (SIGWINCH is only available on
+        Unix, when Loggerz is created in the main thread with a terminal on stdout, and while nobody replaces the
+        handler).
+        """
+        self.__terminal_size.poll_interval = poll_interval
+
     def set_terminal_movements_mode(self, terminal_movements_mode: State):
         if terminal_movements_mode == State.ON:
             self.__terminal_movements_enabled = True
@@ -219,9 +1298,23 @@ class Loggerz(metaclass=Singleton):
             self.__colors_enabled = False
         elif color_mode == State.AUTO:
             self.__colors_enabled = sys.stdout.isatty()
+        self.__build_log_templates()
 
     def set_print_timestamp(self, print_timestamp: bool):
         self.__print_timestamp = print_timestamp
+        self.__build_log_templates()
+
+    def set_timestamp_format(self, timestamp_format: TimestampFormat):
+        """
+        Choose how the timestamps are printed, sinks can override it with their own timestamp_format.
+        """
+        self.__timestamp_format = timestamp_format
+
+    def set_clock(self, clock: Clock):
+        self.__clock = get_clock_function(clock)
+
+    def __get_timestamp_format(self) -> TimestampFormat:
+        return self.__timestamp_format if self.__print_timestamp else None
 
     def __get_log_prefix_as_string(self, log_level) -> str:
         if log_level == LogLevel.EPHEMERAL:
@@ -245,21 +1338,27 @@ class Loggerz(metaclass=Singleton):
         else:
             return "UNKNOWN" if self.__long_prefix else "?"
 
-    def __add_pad_after_endline(self, message: str, pad_lenght: int, sticky: bool) -> str:
-        if not sticky:
-            pos = 0
-
-            pos = message.find('\n', pos)
-            while pos >= 0:
-                pos += 1  # skip the \n
-                message = message[:pos] + "⤷ ".rjust(pad_lenght, " ") + message[pos:]
-                pos += pad_lenght  # skip the pad
-                pos = message.find('\n', pos)
+    def __format_message(self, message: str, pad_length: int, sticky: bool, columns: int, newline_reset: str,
+                         newline_color: str) -> str:
+        """
+        Pad, shorten to columns (when not None) and re-color every line of the message in a single pass.
+        """
+        if columns is None:
+            if '\n' not in message:
+                return message
+            lines = message.split('\n')
+        else:
+            lines = message.split('\n')
+            if (columns - 1) > 0:  # Cut by display width, a line wrapping in the terminal would break the rewind
+                # Keep the last column free, with the cursor on it erasing the rest of the line eats the last character
+                lines = [shorten_to_display_width(line, columns - 1) for line in lines]
 
-        return message
+        # Close the color before each \n and renew it after, then align with the end of the prefix
+        pad = "" if sticky else "⤷ ".rjust(pad_length, " ")
+        return (newline_reset + "\n" + newline_color + pad).join(lines)
 
-    def __get_color_string_for(self, log_level: LogLevel, sticky: bool, before_prefix: bool):
-        if not self.__colors_enabled:
+    def __get_color_string_for(self, log_level: LogLevel, sticky: bool, before_prefix: bool, colors_enabled: bool):
+        if not colors_enabled:
             return ""
         else:
             if sticky:
@@ -284,8 +1383,9 @@ class Loggerz(metaclass=Singleton):
             elif log_level == LogLevel.FATAL:
                 return TerminalColors.LIGHT_RED
 
-    def __get_color_reset_string_for(self, log_level: LogLevel, sticky: bool, before_message: bool):
-        if not self.__colors_enabled:
+    def __get_color_reset_string_for(self, log_level: LogLevel, sticky: bool, before_message: bool,
+                                     colors_enabled: bool):
+        if not colors_enabled:
             return ""
         else:
             if sticky:
@@ -310,58 +1410,18 @@ class Loggerz(metaclass=Singleton):
             elif log_level == LogLevel.FATAL:
                 return "" if before_message else TerminalColors.DEFAULT
 
-    def __re_add_color_string_after_endline(self, message: str, log_level: LogLevel, sticky: bool) -> str:
-        pos = 0
-
-        pos = message.find('\n', pos)
-        while pos >= 0:
-            color_string = self.__get_color_reset_string_for(log_level, sticky, False)
-            message = message[:pos] + color_string + message[pos:]  # remove color before \n
-            pos += len(color_string) + 1  # skip the color_string and the \n
-
-            color_string = self.__get_color_string_for(log_level, sticky, False)
-            message = message[:pos] + color_string + message[pos:]  # renew color after \n
-            pos += len(color_string)  # skip the color_string
-
-            pos = message.find('\n', pos)
-
-        return message
-
     class Logz():
-        def __init__(self, log_level: LogLevel, originator: str, message: str, timestamp: str, sticky: bool):
+        __slots__ = ("log_level", "originator", "message", "timestamp", "sticky")
+
+        def __init__(self, log_level: LogLevel, originator: str, message: str, timestamp: float, sticky: bool):
             self.log_level = log_level
             self.originator = originator
             self.message = message
             self.timestamp = timestamp
             self.sticky = sticky
 
-            self.__number_of_lines = None
-
-        def get_number_of_lines(self):
-            if self.__number_of_lines is None:
-                self.__number_of_lines = self.message.count('\n') + 1  # (endlines in the message) + (final \n)
-                if self.sticky:
-                    self.__number_of_lines += 1  # a sticky is always preceded by a blank line
-
-            return self.__number_of_lines
-
-    def __shorten_line(self, message, columns):
-        output = ""
-        for line in message.splitlines(True):
-            add_endl = False
-            if line[-1] == "\n":
-                line = line[0:-1]
-                add_endl = True
-
-            if (columns - 1) > 0 and len(line) > columns - 1:
-                line = line[0:columns - 1] + "…"
-
-            output += line
-
-            if add_endl:
-                output += "\n"
-
-        return output
+        def is_volatile(self) -> bool:
+            return self.sticky or self.log_level == LogLevel.EPHEMERAL
 
 
 class LogLevel(IntEnum):
@@ -414,3 +1474,16 @@ class LogLevel(IntEnum):
     """
     Use it to signal an unrecoverable error that makes the program stop.
     """
+
+
+_MAX_CACHED_ORIGINATORS = 4096
+
+_LOG_LEVELS = list(LogLevel)  # Indexed by value, to turn the integers sent by other processes back into levels
+
+_OPERATION_LOG = 0
+_OPERATION_BLANK_LINE = 1
+_OPERATION_REMOVE_STICKY = 2
+_OPERATION_REMOVE_EPHEMERALS = 3
+_OPERATION_OUTPUT = 4
+
+_JSON_LEVEL_NAMES = {log_level: '"' + log_level.name + '"' for log_level in LogLevel}
@@ -0,0 +1,66 @@
+import logging
+
+from loggerz.Loggerz import LogLevel, Loggerz
+
+
+def get_log_level(levelno: int) -> LogLevel:
+    """
+    Map a level of the logging module, custom ones included, to the closest LogLevel.
+    """
+    if levelno >= logging.CRITICAL:
+        return LogLevel.FATAL
+    elif levelno >= logging.ERROR:
+        return LogLevel.ERROR
+    elif levelno >= logging.WARNING:
+        return LogLevel.WARNING
+    elif levelno >= logging.INFO:
+        return LogLevel.INFO
+    elif levelno > logging.DEBUG:
+        return LogLevel.VERBOSE
+    else:
+        return LogLevel.DEBUG
+
+
+class LoggerzHandler(logging.Handler):
+    def __init__(self, level: int = logging.NOTSET):
+        """
+        Print the records of the logging module through Loggerz, with the logger name as the originator, so that they
+        do not break the sticky and ephemeral lines. Attach it with logging.getLogger().addHandler(LoggerzHandler()).
+        The message is formatted only once, by Loggerz, and only when the record is printed. The loggers still drop
+        what is below their own level before it gets here.
+        """
+        super().__init__(level)
+        self.__loggerz = Loggerz()
+
+    def handle(self, record: logging.LogRecord):
+        # Loggerz does its own locking, holding the handler lock around emit() would serialize every thread
+        filtered = self.filter(record)
+        if isinstance(filtered, logging.LogRecord):
+            record = filtered
+        if filtered:
+            self.emit(record)
+        return filtered
+
+    def emit(self, record: logging.LogRecord):
+        try:
+            log_level = get_log_level(record.levelno)
+            message = record.msg if isinstance(record.msg, str) else str(record.msg)
+            args = record.args
+            if record.exc_info or record.stack_info:
+                if not self.__loggerz.is_enabled(log_level, record.name):  # Formatting a traceback is costly
+                    return
+                message = record.getMessage()
+                args = None
+                if record.exc_info:
+                    if not record.exc_text:
+                        record.exc_text = _FORMATTER.formatException(record.exc_info)
+                    message += "\n" + record.exc_text
+                if record.stack_info:
+                    message += "\n" + _FORMATTER.formatStack(record.stack_info)
+
+            self.__loggerz.log(log_level, record.name, message, args=args)
+        except Exception:
+            self.handleError(record)
+
+
+_FORMATTER = logging.Formatter()
@@ -0,0 +1,45 @@
+from io import TextIOBase
+from threading import Lock
+
+
+class RedirectedStream(TextIOBase):
+    def __init__(self, original, print_function):
+        """
+        A text stream that hands what is written to it to print_function one line at a time, meant to replace
+        sys.stdout. A partial line is held back until its newline arrives, or printed with a newline on flush().
+        """
+        self.original = original
+        self.__print = print_function
+        self.__partial_line = ""
+        self.__mutex = Lock()
+
+    def write(self, text: str) -> int:
+        self.__mutex.acquire()
+        lines, newline, self.__partial_line = (self.__partial_line + text).rpartition("\n")
+        self.__mutex.release()
+
+        if newline != "":
+            self.__print(lines + newline)
+        return len(text)
+
+    def flush(self):
+        self.__mutex.acquire()
+        partial_line = self.__partial_line
+        self.__partial_line = ""
+        self.__mutex.release()
+
+        if partial_line != "":
+            self.__print(partial_line + "\n")  # Ending it keeps the cursor where the volatile lines expect it
+
+    def writable(self) -> bool:
+        return True
+
+    def isatty(self) -> bool:
+        return self.original.isatty()
+
+    def fileno(self) -> int:
+        return self.original.fileno()
+
+    @property
+    def encoding(self):
+        return self.original.encoding
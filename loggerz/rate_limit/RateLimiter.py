@@ -0,0 +1,142 @@
+from threading import Lock
+
+_MAX_ORIGINATOR_STATES = 4096
+
+
+class _OriginatorState:
+    __slots__ = ("tokens", "last_refill_time", "suppressed", "last_message", "last_args", "repeated",
+                 "first_repeat_time", "last_seen_time", "last_hidden_time")
+
+    def __init__(self, tokens: float, now: float):
+        self.tokens = tokens
+        self.last_refill_time = now
+        self.suppressed = 0
+
+        self.last_message = None
+        self.last_args = None
+        self.repeated = 0
+        self.first_repeat_time = now
+
+        self.last_seen_time = now
+        self.last_hidden_time = now  # When the last suppressed or repeated log arrived
+
+    def has_pending_reports(self) -> bool:
+        return self.repeated > 0 or self.suppressed > 0
+
+
+def _is_duplicate(message, args, state: _OriginatorState) -> bool:
+    try:
+        return bool(message == state.last_message and args == state.last_args)
+    except Exception:  # e.g. arrays, whose comparison has no truth value, are never collapsed
+        return False
+
+
+class RateLimiter:
+    def __init__(self, rate: float, burst: int, collapse_duplicates: bool, report_interval: float = 5.0):
+        """
+        Decide which logs of each (originator, log level) pair are printed. At most burst logs are printed at once,
+        then rate per second (0 disables the limit). With collapse_duplicates, a message identical to the previous
+        one of the same pair is not printed but counted. Every suppression is reported when it ends, or every
+        report_interval seconds while it lasts.
+        Only the state of the most recent pairs is kept, pairs idle for a while are forgotten first.
+        """
+        self.rate = rate
+        self.burst = burst
+        self.collapse_duplicates = collapse_duplicates
+        self.report_interval = report_interval
+
+        self.__states = {}
+        self.__mutex = Lock()
+
+    def check(self, log_level, originator: str, message, args, now: float) -> tuple:
+        """
+        Return whether the log can be printed, and a list of (log_level, originator, message, timestamp) reports to
+        print first.
+        """
+        reports = []
+        with self.__mutex:
+            state = self.__states.get((originator, log_level))
+            if state is None:
+                if len(self.__states) >= _MAX_ORIGINATOR_STATES:
+                    self.__forget_states(now, reports)
+                state = _OriginatorState(self.burst, now)
+                self.__states[originator, log_level] = state
+            state.last_seen_time = now
+
+            allowed = True
+            if self.collapse_duplicates:
+                if _is_duplicate(message, args, state):
+                    if state.repeated == 0:
+                        state.first_repeat_time = now
+                    state.repeated += 1
+                    state.last_hidden_time = now
+                    if now - state.first_repeat_time >= self.report_interval:
+                        reports.append(self.__take_repeated_report(log_level, originator, state))
+                    allowed = False
+                else:
+                    if state.repeated > 0:
+                        reports.append(self.__take_repeated_report(log_level, originator, state))
+                    state.last_message = message
+                    state.last_args = args
+
+            if allowed and self.rate > 0:
+                state.tokens = min(self.burst, state.tokens + (now - state.last_refill_time) * self.rate)
+                state.last_refill_time = now
+                if state.tokens < 1:
+                    state.suppressed += 1
+                    state.last_hidden_time = now
+                    allowed = False
+                else:
+                    state.tokens -= 1
+                    if state.suppressed > 0:
+                        reports.append(self.__take_suppressed_report(log_level, originator, state))
+
+        return allowed, reports
+
+    def take_pending_reports(self, now: float = None, quiet_interval: float = 0.0) -> list:
+        """
+        Take the reports of every pending suppression, or with now only of those quiet for at least quiet_interval.
+        """
+        reports = []
+        with self.__mutex:
+            for (originator, log_level), state in self.__states.items():
+                if now is None or now - state.last_hidden_time >= quiet_interval:
+                    self.__take_reports(log_level, originator, state, reports)
+        return reports
+
+    def has_pending_reports(self) -> bool:
+        with self.__mutex:
+            return any(state.has_pending_reports() for state in self.__states.values())
+
+    def __forget_states(self, now: float, reports: list):
+        # Must be called holding __mutex. Forget the idle pairs, then the oldest ones, down to half the capacity so
+        # that this happens rarely. The pending reports of the forgotten pairs are printed right away.
+        idle_time = max(self.report_interval, self.burst / self.rate if self.rate > 0 else 0.0)
+        for key, state in list(self.__states.items()):
+            if not state.has_pending_reports() and now - state.last_seen_time >= idle_time:
+                del self.__states[key]
+
+        for key in list(self.__states)[:max(len(self.__states) - _MAX_ORIGINATOR_STATES // 2, 0)]:
+            originator, log_level = key
+            self.__take_reports(log_level, originator, self.__states.pop(key), reports)
+
+    def __take_reports(self, log_level, originator: str, state: _OriginatorState, reports: list):
+        if state.repeated > 0:
+            reports.append(self.__take_repeated_report(log_level, originator, state))
+        if state.suppressed > 0:
+            reports.append(self.__take_suppressed_report(log_level, originator, state))
+
+    @staticmethod
+    def __take_repeated_report(log_level, originator: str, state: _OriginatorState) -> tuple:
+        repeated = state.repeated
+        state.repeated = 0
+        return log_level, originator, f"Last message repeated {repeated} more time{'s' if repeated > 1 else ''}", \
+            state.last_hidden_time
+
+    @staticmethod
+    def __take_suppressed_report(log_level, originator: str, state: _OriginatorState) -> tuple:
+        suppressed = state.suppressed
+        state.suppressed = 0
+        plural = "s" if suppressed > 1 else ""
+        return log_level, originator, f"{suppressed} message{plural} suppressed by the rate limit", \
+            state.last_hidden_time
@@ -0,0 +1,356 @@
+from __future__ import annotations
+
+import calendar
+import gzip
+import json
+import mmap
+import os
+import re
+import time
+from datetime import datetime
+from datetime import time as time_of_day
+
+from loggerz.Loggerz import LogLevel
+
+INDEX_SUFFIX = ".lzidx"
+SEGMENT_SUFFIX_PATTERN = r"\.\d{8}-\d{6}-\d{6}(\.gz)?$"  # Appended by RotatingFileSink to the name of the log
+_INDEX_VERSION = 2
+
+# Both the short and the long prefixes printed in front of the text logs
+_TEXT_PREFIXES = {
+    b"_": LogLevel.EPHEMERAL, b"EPHEMER": LogLevel.EPHEMERAL,
+    b"|": LogLevel.DEBUG, b"DEBUG": LogLevel.DEBUG,
+    b":": LogLevel.VERBOSE, b"VERBOSE": LogLevel.VERBOSE,
+    b".": LogLevel.INFO, b"INFO": LogLevel.INFO,
+    b"#": LogLevel.TITLE, b"TITLE": LogLevel.TITLE,
+    b"+": LogLevel.SUCCESS, b"SUCCESS": LogLevel.SUCCESS,
+    b"!": LogLevel.WARNING, b"WARNING": LogLevel.WARNING,
+    b"-": LogLevel.ERROR, b"ERROR": LogLevel.ERROR,
+    b"x": LogLevel.FATAL, b"FATAL": LogLevel.FATAL,
+}
+
+# [prefix] optional timestamp [originator padded] message
+_TEXT_HEADER = re.compile(
+    rb"\[([^\]]+)\] (?:((?:\d{4}-\d{2}-\d{2}[ T])?\d{2}:\d{2}:\d{2})\.(\d{3})(Z?) )?\[(.*?) *\] (.*)")
+_TEXT_CONTINUATION = re.compile(" *⤷ (.*)".encode())
+
+
+def compile_segment_pattern(path: str) -> re.Pattern:
+    """
+    Return the pattern matching the file names of the segments rotated away from path by a RotatingFileSink.
+    """
+    return re.compile(re.escape(os.path.basename(path)) + SEGMENT_SUFFIX_PATTERN)
+
+
+def get_segment_paths(path: str) -> list:
+    """
+    Return the segments rotated away from path by a RotatingFileSink, oldest first, followed by path itself.
+    """
+    directory = os.path.dirname(os.path.abspath(path))
+    segment_pattern = compile_segment_pattern(path)
+    segments = sorted(name for name in os.listdir(directory) if segment_pattern.match(name))
+    paths = [os.path.join(directory, name) for name in segments]
+    if os.path.exists(path):
+        paths.append(path)
+    return paths
+
+
+def query_segments(path: str, min_log_level: LogLevel = None, originator: str = None, since=None, until=None):
+    """
+    Like LogReader.query(), over every segment of a rotated log, oldest first.
+    """
+    for segment_path in get_segment_paths(path):
+        yield from LogReader(segment_path).query(min_log_level, originator, since, until)
+
+
+class LogRecord:
+    __slots__ = ("offset", "log_level", "originator", "timestamp", "message")
+
+    def __init__(self, offset: int, log_level: LogLevel, originator: str, timestamp: float, message: str):
+        self.offset = offset
+        self.log_level = log_level
+        self.originator = originator
+        self.timestamp = timestamp
+        self.message = message
+
+    def __repr__(self):
+        return f"LogRecord({self.offset}, {self.log_level.name}, {self.originator!r}, {self.timestamp}, " \
+               f"{self.message!r})"
+
+
+class LogReader:
+    def __init__(self, path: str, bucket_seconds: int = 60):
+        """
+        Read the text or JSONL output written by Loggerz to path, gzip-compressed if it ends with .gz.
+        The index used by query() is kept in a sidecar file next to it, extended when the file grows and rebuilt
+        when it changes otherwise.
+
+        Timestamps are seconds since the epoch, or seconds since midnight when only the time of the day was printed.
+        """
+        self.path = path
+        self.bucket_seconds = bucket_seconds
+        self.index_path = path + INDEX_SUFFIX
+        self.__index: dict = None
+
+    def records(self):
+        """
+        Iterate over every record of the file, without loading it all in memory.
+        """
+        with self.__open() as source:
+            yield from _parse_records(source.lines_from(0))
+
+    def query(self, min_log_level: LogLevel = None, originator: str = None, since=None, until=None):
+        """
+        Iterate over the records of min_log_level or above, of originator, logged in [since, until), reading only the
+        parts of the file the index points to. since and until are datetimes or seconds since the epoch, or times
+        (or seconds since midnight) for logs that do not print the date.
+        """
+        index = self.get_index()
+        since = _to_seconds(since, index["dated"])
+        until = _to_seconds(until, index["dated"])
+
+        offsets = []
+        for bucket, log_level, bucket_originator, offset_deltas in index["buckets"]:
+            if min_log_level is not None and log_level < min_log_level:
+                continue
+            if originator is not None and bucket_originator != originator:
+                continue
+            if bucket is None:
+                if since is not None or until is not None:
+                    continue
+            elif (since is not None and bucket + self.bucket_seconds <= since) or \
+                    (until is not None and bucket >= until):
+                continue
+
+            offset = 0
+            for offset_delta in offset_deltas:
+                offset += offset_delta
+                offsets.append(offset)
+        offsets.sort()
+
+        with self.__open() as source:
+            for offset in offsets:
+                record = next(_parse_records(source.lines_from(offset)))
+                if (since is None or record.timestamp >= since) and (until is None or record.timestamp < until):
+                    yield record
+
+    def get_index(self) -> dict:
+        """
+        Load the index from the sidecar file, building and saving it first if missing or out of date.
+        """
+        stat = os.stat(self.path)
+        if self.__index is None or not self.__is_index_up_to_date(self.__index, stat):
+            index = self.__index if self.__index is not None else self.__load_index()
+            if index is None or not self.__is_index_up_to_date(index, stat):
+                # Appending is by far the most common change, then only what has been appended needs to be read
+                index = self.__build_index(stat, index if self.__has_only_grown(index, stat) else None)
+                self.__save_index(index)
+            self.__index = index
+        return self.__index
+
+    def __is_index_up_to_date(self, index: dict, stat: os.stat_result) -> bool:
+        return index.get("version") == _INDEX_VERSION and index["size"] == stat.st_size and \
+            index["mtime_ns"] == stat.st_mtime_ns and index["bucket_seconds"] == self.bucket_seconds
+
+    def __has_only_grown(self, index: dict, stat: os.stat_result) -> bool:
+        return index is not None and index.get("version") == _INDEX_VERSION and index["size"] < stat.st_size and \
+            index["bucket_seconds"] == self.bucket_seconds and not self.path.endswith(".gz")
+
+    def __load_index(self) -> dict:
+        try:
+            with open(self.index_path, encoding="utf-8") as file:
+                return json.load(file)
+        except (OSError, ValueError):
+            return None
+
+    def __build_index(self, stat: os.stat_result, grown_index: dict = None) -> dict:
+        """
+        Index every record of the file, or extend grown_index, the index of the file before it grew, reading it again
+        from its last record, which may have got more continuation lines since.
+        """
+        buckets = {}  # (bucket, log level, originator) -> [last offset, offset deltas]
+        dated = None
+        last_offset = 0
+        if grown_index is not None:
+            dated = grown_index["dated"]
+            last_offset = grown_index["last_offset"]
+            for bucket, log_level, originator, offset_deltas in grown_index["buckets"]:
+                buckets[(bucket, log_level, originator)] = [sum(offset_deltas), offset_deltas]
+            for key, entry in buckets.items():
+                if entry[0] == last_offset:  # The last record is the last one of its bucket, it is indexed again
+                    entry[0] -= entry[1].pop()
+                    if len(entry[1]) == 0:
+                        del buckets[key]
+                    break
+
+        with self.__open() as source:
+            for record in _parse_records(source.lines_from(last_offset)):
+                if grown_index is not None:
+                    if record.offset != last_offset:
+                        return self.__build_index(stat)  # The last record is not there anymore, it is another file
+                    grown_index = None
+                last_offset = record.offset
+
+                bucket = None
+                if record.timestamp is not None:
+                    bucket = int(record.timestamp // self.bucket_seconds * self.bucket_seconds)
+                    if dated is None:
+                        dated = record.timestamp >= _SECONDS_PER_DAY
+
+                key = (bucket, int(record.log_level), record.originator)
+                entry = buckets.get(key)
+                if entry is None:
+                    buckets[key] = [record.offset, [record.offset]]
+                else:
+                    entry[1].append(record.offset - entry[0])  # Deltas keep the sidecar file small
+                    entry[0] = record.offset
+        if grown_index is not None:
+            return self.__build_index(stat)  # Not a single record where the last one was
+
+        return {
+            "version": _INDEX_VERSION,
+            "size": stat.st_size,
+            "mtime_ns": stat.st_mtime_ns,
+            "bucket_seconds": self.bucket_seconds,
+            "dated": dated,
+            "last_offset": last_offset,
+            "buckets": [[bucket, log_level, originator, entry[1]]
+                        for (bucket, log_level, originator), entry in buckets.items()],
+        }
+
+    def __save_index(self, index: dict):
+        temporary_path = self.index_path + ".tmp"
+        try:
+            with open(temporary_path, "w", encoding="utf-8") as file:
+                json.dump(index, file, separators=(",", ":"))
+            os.replace(temporary_path, self.index_path)
+        except OSError:
+            pass  # A read-only directory only means the index is rebuilt next time
+
+    def __open(self):
+        if self.path.endswith(".gz"):
+            return _GzipSource(self.path)
+        return _MappedSource(self.path)
+
+
+class _MappedSource:
+    def __init__(self, path: str):
+        self.__file = open(path, "rb")
+        size = os.fstat(self.__file.fileno()).st_size
+        self.__data = mmap.mmap(self.__file.fileno(), 0, access=mmap.ACCESS_READ) if size > 0 else b""
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        if isinstance(self.__data, mmap.mmap):
+            self.__data.close()
+        self.__file.close()
+
+    def lines_from(self, offset: int):
+        data = self.__data
+        size = len(data)
+        while offset < size:
+            end = data.find(b"\n", offset)
+            if end == -1:
+                end = size
+            yield offset, data[offset:end]
+            offset = end + 1
+
+
+class _GzipSource:
+    def __init__(self, path: str):
+        self.__file = gzip.open(path, "rb")
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.__file.close()
+
+    def lines_from(self, offset: int):
+        # Offsets are in the decompressed data, seeking forward only decompresses what is in between
+        self.__file.seek(offset)
+        for line in self.__file:
+            yield offset, line[:-1] if line.endswith(b"\n") else line
+            offset += len(line)
+
+
+def _parse_records(lines):
+    """
+    Group the lines of a text log with their continuation lines and turn every JSONL line into a record.
+    Blank lines and lines that are not logs are skipped.
+    """
+    record: LogRecord = None
+    message_lines = None
+    for offset, line in lines:
+        if line.startswith(b"{"):
+            if record is not None:
+                record.message = "\n".join(message_lines)
+                yield record
+                record = None
+            try:
+                record_json = json.loads(line)
+            except ValueError:
+                continue  # The last line may still be being written
+            yield LogRecord(offset, LogLevel[record_json["level"]], record_json["originator"],
+                            record_json["timestamp"], record_json["message"])
+            continue
+
+        if record is not None:
+            continuation = _TEXT_CONTINUATION.fullmatch(line)
+            if continuation is not None:
+                message_lines.append(continuation.group(1).decode("utf-8", "replace"))
+                continue
+            record.message = "\n".join(message_lines)
+            yield record
+            record = None
+
+        header = _TEXT_HEADER.fullmatch(line)
+        if header is not None:
+            prefix, second, milliseconds, utc, originator, message = header.groups()
+            log_level = _TEXT_PREFIXES.get(prefix.rstrip())
+            if log_level is not None:
+                timestamp = _parse_second(second, utc) + int(milliseconds) / 1000 if second is not None else None
+                record = LogRecord(offset, log_level, originator.decode("utf-8", "replace"), timestamp, None)
+                message_lines = [message.decode("utf-8", "replace")]
+
+    if record is not None:
+        record.message = "\n".join(message_lines)
+        yield record
+
+
+_SECONDS_PER_DAY = 24 * 60 * 60
+_parsed_second_cache = (None, None)  # The last second parsed and its value, as many logs share the same second
+
+
+def _parse_second(second: bytes, utc: bytes) -> float:
+    global _parsed_second_cache
+    cached_second, value = _parsed_second_cache
+    if second + utc == cached_second:
+        return value
+
+    text = second.decode("ascii")
+    if len(text) == 8:  # Only the time of the day
+        hours, minutes, seconds = text.split(":")
+        value = int(hours) * 3600 + int(minutes) * 60 + int(seconds)
+    elif utc:
+        value = calendar.timegm(time.strptime(text, "%Y-%m-%dT%H:%M:%S"))
+    else:
+        value = time.mktime(time.strptime(text, "%Y-%m-%d %H:%M:%S"))
+    _parsed_second_cache = (second + utc, value)
+    return value
+
+
+def _to_seconds(bound, dated: bool) -> float:
+    if bound is None or isinstance(bound, (int, float)):
+        return bound
+    if isinstance(bound, datetime):
+        if dated is not False:
+            return bound.timestamp()
+        bound = bound.time()
+    if not isinstance(bound, time_of_day):
+        raise TypeError(f"Invalid time bound: {bound!r}")
+    if dated:
+        raise ValueError("These logs print the date, use a datetime instead of a time")
+    return bound.hour * 3600 + bound.minute * 60 + bound.second + bound.microsecond / 1_000_000
@@ -0,0 +1,99 @@
+import asyncio
+import os
+import sys
+from threading import Lock
+
+from loggerz.sinks.Sinks import Format, Sink
+
+
+class NonBlockingStreamSink(Sink):
+    def __init__(self, fd: int = None, loop: asyncio.AbstractEventLoop = None, interactive: bool = True,
+                 high_water_mark: int = 64 * 1024, encoding: str = "utf-8", output_format: Format = None):
+        """
+        Write to the file descriptor fd (stdout by default) in non-blocking mode. What the stream cannot take right
+        away is kept and written by the event loop as soon as the stream is writable, so a slow terminal or a full
+        pipe never blocks the writer. It can be written from any thread, see Loggerz.attach_event_loop().
+        The non-blocking mode is set on the open file, so until close() it also applies to every other writer of fd.
+        """
+        self.fd = fd if fd is not None else sys.stdout.fileno()
+        self.interactive = interactive
+        self.high_water_mark = high_water_mark
+        self.encoding = encoding
+        self.output_format = output_format
+
+        self.__loop = loop if loop is not None else asyncio.get_event_loop()
+        self.__mutex = Lock()  # Guards the buffer and the waiters, written by the writer thread and by the loop
+        self.__buffer = bytearray()
+        self.__drain_waiters = []
+        self.__was_blocking = os.get_blocking(self.fd)
+        os.set_blocking(self.fd, False)
+
+    def write(self, output: str):
+        data = output.encode(self.encoding)
+        with self.__mutex:
+            if len(self.__buffer) > 0:
+                self.__buffer += data  # Keep the order, the loop will write it after what is already waiting
+                return
+
+            try:
+                written = os.write(self.fd, data)
+            except BlockingIOError:
+                written = 0
+            if written < len(data):
+                self.__buffer += data[written:]
+                self.__loop.call_soon_threadsafe(self.__loop.add_writer, self.fd, self.__on_writable)
+
+    async def drain(self):
+        while True:
+            with self.__mutex:
+                if len(self.__buffer) <= self.high_water_mark:
+                    return
+                waiter = self.__loop.create_future()
+                self.__drain_waiters.append(waiter)
+            await waiter
+
+    def flush(self):
+        # Blocking on purpose: used when everything must be out, e.g. on cleanup. The loop stops watching the stream
+        # the next time it finds nothing to write
+        with self.__mutex:
+            if len(self.__buffer) > 0:
+                os.set_blocking(self.fd, True)
+                try:
+                    while len(self.__buffer) > 0:
+                        written = os.write(self.fd, self.__buffer)
+                        del self.__buffer[:written]
+                finally:
+                    os.set_blocking(self.fd, False)
+                self.__wake_up_drain_waiters()
+
+    def close(self):
+        self.flush()
+        os.set_blocking(self.fd, self.__was_blocking)
+
+    def __on_writable(self):
+        with self.__mutex:
+            if len(self.__buffer) > 0:
+                try:
+                    written = os.write(self.fd, self.__buffer)
+                except BlockingIOError:
+                    return
+                del self.__buffer[:written]
+
+            if len(self.__buffer) == 0:
+                self.__loop.remove_writer(self.fd)
+            if len(self.__buffer) <= self.high_water_mark:
+                self.__wake_up_drain_waiters()
+
+    def __wake_up_drain_waiters(self):
+        waiters = self.__drain_waiters
+        self.__drain_waiters = []
+        for waiter in waiters:
+            try:
+                self.__loop.call_soon_threadsafe(set_result_unless_done, waiter)
+            except RuntimeError:
+                pass  # The loop is closed, nobody is waiting anymore
+
+
+def set_result_unless_done(future: asyncio.Future):
+    if not future.done():
+        future.set_result(None)
@@ -0,0 +1,95 @@
+import gzip
+import os
+import shutil
+from datetime import datetime
+from queue import Queue
+from threading import Thread
+from time import time
+
+from loggerz.reader.LogReader import INDEX_SUFFIX, compile_segment_pattern
+from loggerz.sinks.Sinks import BufferedFileSink, Format
+from loggerz.time_utils.TimeUtils import TimestampFormat
+
+
+class RotatingFileSink(BufferedFileSink):
+    def __init__(self, path: str, max_bytes: int = 0, rotate_interval: float = 0, backup_count: int = 5,
+                 compress: bool = True, buffer_size: int = 64 * 1024, flush_interval: float = 1.0,
+                 encoding: str = "utf-8", output_format: Format = None, timestamp_format: TimestampFormat = None):
+        """
+        A BufferedFileSink that moves the file aside once it grows over max_bytes or once rotate_interval seconds
+        have passed since it was opened (use 0 to disable either). Rotated segments are named
+        <path>.<YYYYmmdd-HHMMSS-ffffff>, gzip-compressed when compress is set, and only the newest backup_count
+        are kept. Compression and deletion happen on a background thread.
+        """
+        self.max_bytes = max_bytes
+        self.rotate_interval = rotate_interval
+        self.backup_count = backup_count
+        self.compress = compress
+
+        self.__segment_pattern = compile_segment_pattern(path)
+        self.__housekeeping_queue = Queue()
+        self.__housekeeper = Thread(target=self.__housekeeper_loop, name="LoggerzRotation", daemon=True)
+        self.__housekeeper.start()
+
+        super().__init__(path, buffer_size, flush_interval, encoding, output_format, timestamp_format)
+
+    def close(self):
+        super().close()
+        self.__housekeeping_queue.put(None)
+        self.__housekeeper.join()
+
+    def _open(self):
+        file = open(self.path, "a", encoding=self.encoding)
+        self.__current_size = file.tell()
+        self.__next_rotation_time = time() + self.rotate_interval if self.rotate_interval > 0 else None
+        return file
+
+    def _write_to_file(self, output: str):
+        data_size = len(output.encode(self.encoding)) if not output.isascii() else len(output)
+        if self.__current_size > 0 and (
+                (self.max_bytes > 0 and self.__current_size + data_size > self.max_bytes) or
+                (self.__next_rotation_time is not None and time() >= self.__next_rotation_time)):
+            self.__rotate()
+
+        self._file.write(output)
+        self.__current_size += data_size
+
+    def __rotate(self):
+        # Must be called holding _mutex
+        self._file.close()
+        rotated_path = self.path + "." + datetime.now().strftime("%Y%m%d-%H%M%S-%f")
+        os.replace(self.path, rotated_path)
+        self._file = self._open()
+        self.__housekeeping_queue.put(rotated_path)  # Compress and prune without blocking the writer
+
+    def __housekeeper_loop(self):
+        while True:
+            rotated_path = self.__housekeeping_queue.get()
+            if rotated_path is None:
+                return
+
+            self.__remove_old_segments()
+            if self.compress and os.path.exists(rotated_path):  # It may be already out of the retention count
+                self.__compress(rotated_path)
+
+    def __compress(self, rotated_path: str):
+        temporary_path = rotated_path + ".gz.tmp"
+        with open(rotated_path, "rb") as source, gzip.open(temporary_path, "wb") as destination:
+            shutil.copyfileobj(source, destination, 1024 * 1024)
+        os.replace(temporary_path, rotated_path + ".gz")
+        os.remove(rotated_path)
+        self.__remove_index(rotated_path)
+
+    def __remove_old_segments(self):
+        directory = os.path.dirname(os.path.abspath(self.path))
+        segments = sorted(name for name in os.listdir(directory) if self.__segment_pattern.match(name))
+        for name in segments[:max(len(segments) - self.backup_count, 0)]:
+            os.remove(os.path.join(directory, name))
+            self.__remove_index(os.path.join(directory, name))
+
+    def __remove_index(self, segment_path: str):
+        # Built by a LogReader, useless once its segment is gone
+        try:
+            os.remove(segment_path + INDEX_SUFFIX)
+        except FileNotFoundError:
+            pass
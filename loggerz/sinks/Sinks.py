@@ -0,0 +1,159 @@
+import sys
+import traceback
+from enum import IntEnum
+from threading import Event, Lock, Thread
+from time import monotonic
+
+from loggerz.time_utils.TimeUtils import TimestampFormat
+
+
+class Format(IntEnum):
+    TEXT = 0
+    """
+    Human readable lines, the same that are shown in the terminal.
+    """
+
+    JSONL = 1
+    """
+    One JSON object per log, including sticky and ephemeral ones, without any escape sequence.
+    """
+
+
+class Sink:
+    interactive = False
+    """
+    An interactive sink receives colors and the escape sequences used to draw the sticky and ephemeral lines.
+    The others only receive the permanent lines, without any escape sequence.
+    """
+
+    output_format: Format = None
+    """
+    The format written to this sink, None means the one chosen with Loggerz.set_output_format().
+    """
+
+    timestamp_format: TimestampFormat = None
+    """
+    How a sink that is not interactive prints the timestamps, None means the same as the terminal. JSONL sinks only
+    add the formatted time next to the epoch timestamp when this is set.
+    """
+
+    encoding: str = None
+    """
+    The encoding of the written output, None when unknown.
+    """
+
+    def write(self, output: str):
+        raise NotImplementedError
+
+    def flush(self):
+        pass
+
+    async def drain(self):
+        """
+        Wait until the sink can take more output without growing its buffer, only asyncio sinks need to wait.
+        """
+        pass
+
+    def close(self):
+        self.flush()
+
+
+class TerminalSink(Sink):
+    interactive = True
+
+    def __init__(self, stream=None, output_format: Format = None):
+        self.__stream = stream  # None means the current sys.stdout, like print() does
+        self.output_format = output_format
+
+    @property
+    def stream(self):
+        return self.__stream
+
+    @property
+    def encoding(self) -> str:
+        stream = self.__stream if self.__stream is not None else sys.stdout
+        return getattr(stream, "encoding", None)
+
+    def write(self, output: str):
+        stream = self.__stream if self.__stream is not None else sys.stdout
+        stream.write(output)
+
+    def flush(self):
+        stream = self.__stream if self.__stream is not None else sys.stdout
+        stream.flush()
+
+
+class BufferedFileSink(Sink):
+    def __init__(self, path: str, buffer_size: int = 64 * 1024, flush_interval: float = 1.0, encoding: str = "utf-8",
+                 output_format: Format = None, timestamp_format: TimestampFormat = None):
+        """
+        Append the permanent lines to the file at path. Writes are kept in memory until buffer_size characters are
+        collected or flush_interval seconds have passed since the last flush (use 0 to flush only when full).
+        """
+        self.path = path
+        self.buffer_size = buffer_size
+        self.flush_interval = flush_interval
+        self.encoding = encoding
+        self.output_format = output_format
+        self.timestamp_format = timestamp_format
+
+        self._file = self._open()
+        self.__buffer = []
+        self.__buffered_chars = 0
+        self.__last_flush_time = monotonic()
+        self._mutex = Lock()
+
+        self.__closed = Event()
+        self.__flusher: Thread = None
+        if flush_interval > 0:
+            # Flush periodically even when nothing new is written
+            self.__flusher = Thread(target=self.__flusher_loop, name="LoggerzFileFlusher", daemon=True)
+            self.__flusher.start()
+
+    def write(self, output: str):
+        if output == "":
+            return
+
+        with self._mutex:
+            self.__buffer.append(output)
+            self.__buffered_chars += len(output)
+            if self.__buffered_chars >= self.buffer_size or \
+                    (self.flush_interval > 0 and monotonic() - self.__last_flush_time >= self.flush_interval):
+                self._flush_buffer()
+
+    def flush(self):
+        with self._mutex:
+            self._flush_buffer()
+
+    def close(self):
+        self.__closed.set()
+        if self.__flusher is not None:
+            self.__flusher.join()
+        with self._mutex:
+            try:
+                self._flush_buffer()
+            finally:
+                self._file.close()
+
+    def _open(self):
+        return open(self.path, "a", encoding=self.encoding)
+
+    def _flush_buffer(self):
+        # Must be called holding _mutex
+        if len(self.__buffer) > 0:
+            output = "".join(self.__buffer)
+            self.__buffer.clear()
+            self.__buffered_chars = 0
+            self._write_to_file(output)
+            self._file.flush()
+        self.__last_flush_time = monotonic()
+
+    def _write_to_file(self, output: str):
+        self._file.write(output)
+
+    def __flusher_loop(self):
+        while not self.__closed.wait(self.flush_interval):
+            try:
+                self.flush()
+            except OSError:
+                traceback.print_exc()  # Keep flushing periodically, e.g. the disk may have room again later
@@ -0,0 +1,39 @@
+from time import monotonic
+
+
+class Stats:
+    __slots__ = ("log_levels", "start_time", "logged", "filtered", "dropped", "bytes_written", "build_time",
+                 "repaint_time", "write_time", "print_lock_wait_time", "volatile_lines_lock_wait_time")
+
+    def __init__(self, log_levels: list):
+        """
+        Counters and timings collected by Loggerz while enabled, the per level counters are indexed by log level.
+        Times are in seconds.
+        """
+        self.log_levels = log_levels
+        self.start_time = monotonic()
+
+        self.logged = [0] * len(log_levels)
+        self.filtered = [0] * len(log_levels)
+        self.dropped = [0] * len(log_levels)
+        self.bytes_written = 0  # Encoded as the sinks encode it, UTF-8 when they do not tell
+
+        self.build_time = 0.0
+        self.repaint_time = 0.0
+        self.write_time = 0.0
+        self.print_lock_wait_time = 0.0
+        self.volatile_lines_lock_wait_time = 0.0
+
+    def snapshot(self) -> dict:
+        return {
+            "elapsed_time": monotonic() - self.start_time,
+            "logged": {log_level.name: count for log_level, count in zip(self.log_levels, self.logged)},
+            "filtered": {log_level.name: count for log_level, count in zip(self.log_levels, self.filtered)},
+            "dropped": {log_level.name: count for log_level, count in zip(self.log_levels, self.dropped)},
+            "bytes_written": self.bytes_written,
+            "build_time": self.build_time,
+            "repaint_time": self.repaint_time,
+            "write_time": self.write_time,
+            "print_lock_wait_time": self.print_lock_wait_time,
+            "volatile_lines_lock_wait_time": self.volatile_lines_lock_wait_time,
+        }
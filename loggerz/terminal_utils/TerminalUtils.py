@@ -1,3 +1,13 @@
+import os
+import shutil
+import signal
+import sys
+import unicodedata
+from time import monotonic
+
+_TAB_SIZE = 8
+
+
 def get_move_cursor_up_as_string(lines: int):
     if lines > 0:
         return '\033[' + str(lines) + 'A'
@@ -5,6 +15,13 @@ def get_move_cursor_up_as_string(lines: int):
         return ""
 
 
+def get_move_cursor_down_as_string(lines: int):
+    if lines > 0:
+        return '\033[' + str(lines) + 'B'
+    else:
+        return ""
+
+
 class TerminalMovements:
     ERASE_LINE_FORWARD = '\033[0K'
     ERASE_LINE = '\033[2K'
@@ -22,3 +39,91 @@ class TerminalColors:
     LIGHT_BLUE = '\033[34m'
     DEFAULT = '\033[39m'
     BG_DEFAULT = '\033[49m'
+
+
+def get_display_width(text: str) -> int:
+    """
+    The number of terminal columns taken by text: wide characters take two columns and combining ones take none.
+    Tabs are counted as expanded by str.expandtabs().
+    """
+    if "\t" in text:
+        text = text.expandtabs(_TAB_SIZE)
+    if text.isascii():
+        return len(text)
+
+    width = 0
+    for char in text:
+        width += _get_char_display_width(char)
+    return width
+
+
+def shorten_to_display_width(text: str, columns: int, ellipsis: str = "…") -> str:
+    """
+    Cut text so that it fits in columns terminal columns, including the ellipsis added when something is removed.
+    Tabs are expanded to spaces first, the columns a tab takes depend on where the terminal draws it.
+    """
+    if "\t" in text:
+        text = text.expandtabs(_TAB_SIZE)
+    if text.isascii():
+        return text if len(text) <= columns else text[0:columns - 1] + ellipsis
+    if get_display_width(text) <= columns:
+        return text
+
+    width = 0
+    for i, char in enumerate(text):
+        width += _get_char_display_width(char)
+        if width > columns - 1:
+            return text[0:i] + ellipsis
+    return text
+
+
+def _get_char_display_width(char: str) -> int:
+    if unicodedata.combining(char) or unicodedata.category(char) in ("Mn", "Me", "Cf", "Cc"):
+        return 0
+    return 2 if unicodedata.east_asian_width(char) in ("W", "F") else 1
+
+
+class TerminalSizeCache:
+    def __init__(self, poll_interval: float = 1.0):
+        """
+        Remember the terminal size and refresh it when the terminal is resized (SIGWINCH) or, where the signal cannot
+        be used (not in the main thread, no terminal on stdout, not supported by the platform or the handler has been
+        replaced since), at most every poll_interval seconds.
+        """
+        self.poll_interval = poll_interval
+        self.__size: os.terminal_size = None
+        self.__last_check_time = 0.0
+        self.__uses_signal = False
+        self.__previous_handler = None
+        self.__resize_handler = self.__on_resize  # Kept to recognize it, every access creates a new bound method
+
+        sigwinch = getattr(signal, "SIGWINCH", None)
+        if sigwinch is not None and sys.stdout is not None and sys.stdout.isatty():
+            try:
+                self.__previous_handler = signal.signal(sigwinch, self.__resize_handler)
+                self.__uses_signal = True
+            except ValueError:  # Not called from the main thread
+                pass
+
+    def get_size(self) -> os.terminal_size:
+        size = self.__size
+        now = monotonic()
+        if size is None or now - self.__last_check_time >= self.poll_interval:
+            self.__last_check_time = now
+            if size is None or not self.__is_notified_of_resizes():
+                size = shutil.get_terminal_size()
+                self.__size = size
+        return size
+
+    def invalidate(self):
+        self.__size = None
+
+    def __is_notified_of_resizes(self) -> bool:
+        if self.__uses_signal and signal.getsignal(signal.SIGWINCH) is not self.__resize_handler:
+            self.__uses_signal = False  # The application installed its own handler, poll from now on
+        return self.__uses_signal
+
+    def __on_resize(self, signum, frame):
+        self.__size = None
+        if callable(self.__previous_handler):
+            self.__previous_handler(signum, frame)
@@ -0,0 +1,73 @@
+from datetime import datetime, timezone
+from enum import IntEnum
+from time import monotonic, time
+
+_MONOTONIC_TO_EPOCH = time() - monotonic()
+
+
+def monotonic_time() -> float:
+    """
+    Seconds since the epoch like time(), but derived from the monotonic clock so it never jumps backwards.
+    """
+    return _MONOTONIC_TO_EPOCH + monotonic()
+
+
+class Clock(IntEnum):
+    WALL = 0
+    """
+    The system clock, it follows NTP adjustments and manual changes.
+    """
+
+    MONOTONIC = 1
+    """
+    The monotonic clock anchored to the system clock at import time, the order of the timestamps is always preserved.
+    """
+
+
+def get_clock_function(clock: Clock):
+    return monotonic_time if clock == Clock.MONOTONIC else time
+
+
+class TimestampFormat(IntEnum):
+    TIME = 0
+    """
+    Local time, like 10:04:59.123
+    """
+
+    DATETIME = 1
+    """
+    Local date and time, like 2021-03-01 10:04:59.123
+    """
+
+    ISO8601_UTC = 2
+    """
+    UTC date and time in ISO-8601, like 2021-03-01T09:04:59.123Z
+    """
+
+
+class TimestampFormatter:
+    def __init__(self, timestamp_format: TimestampFormat):
+        self.timestamp_format = timestamp_format
+        self.__cache = (None, "")  # The last second formatted and its string, swapped at once to be thread safe
+
+    def format(self, timestamp: float) -> str:
+        # Whole microseconds first, like datetime does: the fraction of a float is rarely exact, e.g. .123 is .12299...
+        microseconds = round(timestamp * 1_000_000)
+        second = microseconds // 1_000_000
+        cached_second, prefix = self.__cache
+        if second != cached_second:
+            prefix = self.__format_second(second)
+            self.__cache = (second, prefix)
+
+        milliseconds = microseconds // 1000 % 1000
+        if self.timestamp_format == TimestampFormat.ISO8601_UTC:
+            return f"{prefix}.{milliseconds:03d}Z"
+        return f"{prefix}.{milliseconds:03d}"
+
+    def __format_second(self, second: int) -> str:
+        if self.timestamp_format == TimestampFormat.ISO8601_UTC:
+            return datetime.fromtimestamp(second, timezone.utc).strftime('%Y-%m-%dT%H:%M:%S')
+        elif self.timestamp_format == TimestampFormat.DATETIME:
+            return datetime.fromtimestamp(second).strftime('%Y-%m-%d %H:%M:%S')
+        else:
+            return datetime.fromtimestamp(second).strftime('%H:%M:%S')
@@ -0,0 +1,43 @@
+import unittest
+
+from loggerz.Loggerz import LogLevel, Loggerz, State
+from loggerz.singleton.Singleton import Singleton
+from loggerz.sinks.Sinks import Format, Sink
+
+
+class MemorySink(Sink):
+    def __init__(self, output_format: Format = None, interactive: bool = False):
+        self.output_format = output_format
+        self.interactive = interactive
+        self.output = []
+
+    def write(self, output: str):
+        self.output.append(output)
+
+    def get_text(self) -> str:
+        return "".join(self.output)
+
+
+class LoggerzTestCase(unittest.TestCase):
+    sink_output_format: Format = None
+    """
+    The output format of self.sink, None means the one chosen with Loggerz.set_output_format().
+    """
+
+    def setUp(self):
+        """
+        Give every test a new Loggerz, without terminal movements, logging from INFO and writing only to self.sink.
+        """
+        Singleton._instances.pop(Loggerz, None)
+        self.log = Loggerz()
+        self.log.set_terminal_movements_mode(State.OFF)
+        self.log.set_target_log_level(LogLevel.INFO)
+        for sink in self.log.get_sinks():
+            self.log.remove_sink(sink)
+        self.sink = MemorySink(self.sink_output_format)
+        self.log.add_sink(self.sink)
+
+    def tearDown(self):
+        # Stop the threads and timers of this instance, the next test gets a new one
+        self.log.cleanup()
+        Singleton._instances.pop(Loggerz, None)
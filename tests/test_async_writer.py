@@ -0,0 +1,39 @@
+import io
+import sys
+import threading
+import unittest
+
+from loggerz.Loggerz import LogLevel
+from tests.helpers import LoggerzTestCase
+
+
+class AsyncWriterTest(LoggerzTestCase):
+    def setUp(self):
+        super().setUp()
+        self.stderr = sys.stderr
+        sys.stderr = io.StringIO()
+
+    def tearDown(self):
+        super().tearDown()
+        sys.stderr = self.stderr
+
+    def test_the_writer_thread_survives_a_failing_batch(self):
+        self.log.set_async_mode(True, queue_size=4)
+
+        def log_and_flush():
+            self.log.log(LogLevel.INFO, None, "cannot be built without an originator")
+            self.log.flush()
+            for i in range(100):
+                self.log.log(LogLevel.INFO, "app", "message %d", args=(i,))
+            self.log.flush()
+
+        thread = threading.Thread(target=log_and_flush, daemon=True)
+        thread.start()
+        thread.join(5.0)
+        self.assertFalse(thread.is_alive())
+        self.assertIn("message 99", self.sink.get_text())
+        self.assertIn("the writer thread failed", sys.stderr.getvalue())
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,72 @@
+import threading
+import unittest
+
+from loggerz.Loggerz import LogLevel
+from tests.helpers import LoggerzTestCase
+
+
+class BatchTest(LoggerzTestCase):
+    def test_log_many_is_printed_with_a_single_write(self):
+        self.log.set_target_log_level(LogLevel.EPHEMERAL)
+        self.log.log_many([
+            (LogLevel.INFO, "app", "first"),
+            (LogLevel.INFO, "app", "status", True),
+            (LogLevel.INFO, "app", "second"),
+            (LogLevel.EPHEMERAL, "app", "progress"),
+            (LogLevel.INFO, "app", "third"),
+        ])
+        self.log.remove_sticky()
+        self.log.remove_ephemerals()
+
+        self.assertEqual(len(self.sink.output), 1)
+        self.assertIn("third", self.sink.get_text())
+
+    def test_nested_batches_are_printed_at_the_end_of_the_outer_one(self):
+        with self.log.batch():
+            self.log.log(LogLevel.INFO, "app", "outer")
+            with self.log.batch():
+                self.log.log(LogLevel.INFO, "app", "inner")
+            self.assertEqual(self.sink.output, [])
+            self.log.log(LogLevel.INFO, "app", "outer again")
+
+        self.assertEqual(len(self.sink.output), 1)
+        text = self.sink.get_text()
+        self.assertLess(text.index("outer"), text.index("inner"))
+        self.assertLess(text.index("inner"), text.index("outer again"))
+
+    def test_a_batch_holds_back_only_its_own_thread(self):
+        in_batch = threading.Event()
+        logged_outside = threading.Event()
+
+        def log_in_batch():
+            with self.log.batch():
+                self.log.log(LogLevel.INFO, "worker", "held")
+                in_batch.set()
+                logged_outside.wait(5)
+
+        worker = threading.Thread(target=log_in_batch)
+        worker.start()
+        in_batch.wait(5)
+        self.log.log(LogLevel.INFO, "app", "not held")
+        self.assertIn("not held", self.sink.get_text())
+        self.assertNotIn("held", self.sink.get_text().replace("not held", ""))
+        logged_outside.set()
+        worker.join()
+
+        self.assertEqual(len(self.sink.output), 2)
+        self.assertIn("held", self.sink.output[1])
+
+    def test_what_is_held_is_printed_when_the_block_raises(self):
+        with self.assertRaises(ValueError):
+            with self.log.batch():
+                self.log.log(LogLevel.ERROR, "app", "before the failure")
+                raise ValueError()
+
+        self.assertEqual(len(self.sink.output), 1)
+        self.assertIn("before the failure", self.sink.get_text())
+        self.log.log(LogLevel.INFO, "app", "after the batch")
+        self.assertEqual(len(self.sink.output), 2)  # Not held by a batch left open
+
+
+if __name__ == '__main__':
+    unittest.main()
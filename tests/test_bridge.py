@@ -0,0 +1,71 @@
+import io
+import logging
+import sys
+import threading
+import unittest
+
+from loggerz.Loggerz import LogLevel
+from loggerz.bridge.LoggingBridge import LoggerzHandler
+from loggerz.sinks.Sinks import TerminalSink
+from tests.helpers import LoggerzTestCase
+
+
+class RedirectedStdoutTest(LoggerzTestCase):
+    def setUp(self):
+        super().setUp()
+        self.stdout = sys.stdout
+        self.output = io.StringIO()
+        sys.stdout = self.output
+
+    def tearDown(self):
+        super().tearDown()
+        sys.stdout = self.stdout
+
+    def test_a_terminal_sink_added_while_redirected_writes_to_the_real_stdout(self):
+        self.log.redirect_stdout()
+        sink = TerminalSink()
+        adding_thread = threading.Thread(target=self.log.add_sink, args=(sink,), daemon=True)
+        adding_thread.start()
+        adding_thread.join(5.0)
+        self.assertFalse(adding_thread.is_alive())
+
+        logging_thread = threading.Thread(target=self.log.log, args=(LogLevel.INFO, "app", "hello"), daemon=True)
+        logging_thread.start()
+        logging_thread.join(5.0)
+        self.assertFalse(logging_thread.is_alive())
+        self.assertIn("hello", self.output.getvalue())
+
+        self.log.restore_stdout()
+        self.assertIn(sink, self.log.get_sinks())
+        self.log.remove_sink(sink)
+        self.assertNotIn(sink, self.log.get_sinks())
+
+
+class LoggingBridgeTest(LoggerzTestCase):
+    def setUp(self):
+        super().setUp()
+        self.logger = logging.getLogger("bridge_test")
+        self.logger.setLevel(logging.DEBUG)
+        self.logger.propagate = False
+        self.handler = LoggerzHandler()
+        self.logger.addHandler(self.handler)
+
+    def tearDown(self):
+        super().tearDown()
+        self.logger.removeHandler(self.handler)
+
+    def test_filtered_records_reach_the_flight_recorder_and_the_stats(self):
+        self.log.set_flight_recorder(10)
+        self.log.set_stats_enabled(True)
+        self.logger.debug("connecting to %s", "db")
+        self.assertEqual(self.log.stats()["filtered"]["DEBUG"], 1)
+        self.assertNotIn("connecting", self.sink.get_text())
+
+        self.logger.error("failed")
+        text = self.sink.get_text()
+        self.assertIn("connecting to db", text)
+        self.assertIn("failed", text)
+
+
+if __name__ == '__main__':
+    unittest.main()
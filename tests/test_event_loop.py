@@ -0,0 +1,137 @@
+import asyncio
+import io
+import os
+import sys
+import threading
+import time
+import unittest
+
+from loggerz.Loggerz import LogLevel, State
+from loggerz.sinks.NonBlockingStreamSink import NonBlockingStreamSink
+from loggerz.sinks.Sinks import TerminalSink
+from tests.helpers import LoggerzTestCase, MemorySink
+
+
+class EventLoopTest(LoggerzTestCase):
+    def setUp(self):
+        super().setUp()
+        self.stdout = sys.stdout
+        self.log.add_sink(TerminalSink())  # Writing to whatever sys.stdout is at the time
+
+    def tearDown(self):
+        super().tearDown()
+        sys.stdout = self.stdout
+
+    def get_sinks(self) -> list:
+        return self.log.get_sinks()
+
+    def attach(self, non_blocking_stdout: bool) -> list:
+        async def attach_and_detach():
+            self.log.attach_event_loop(non_blocking_stdout=non_blocking_stdout)
+            sinks = self.get_sinks()
+            self.log.detach_event_loop()
+            return sinks
+
+        return asyncio.run(attach_and_detach())
+
+    def test_the_loop_keeps_running_while_stdout_is_a_full_pipe(self):
+        read_fd, write_fd = os.pipe()
+        os.set_blocking(write_fd, False)
+        filled = 0
+        try:
+            while True:
+                filled += os.write(write_fd, b"x" * 4096)
+        except BlockingIOError:
+            os.set_blocking(write_fd, True)
+
+        def empty_the_pipe():
+            emptied = 0
+            while emptied < filled:
+                emptied += len(os.read(read_fd, filled - emptied))
+
+        with open(read_fd, "rb"), open(write_fd, "w", buffering=1) as writer:
+            sys.stdout = writer
+            # Empty the pipe after a while, so that a blocked loop fails the test instead of hanging it
+            emptier = threading.Timer(2, empty_the_pipe)
+            emptier.start()
+
+            async def log_and_tick() -> int:
+                self.log.attach_event_loop()
+                try:
+                    self.log.log(LogLevel.INFO, "app", "blocked by the full pipe")
+                    ticks = 0
+                    deadline = time.monotonic() + 0.5
+                    while time.monotonic() < deadline:
+                        await asyncio.sleep(0.01)
+                        ticks += 1
+                    return ticks
+                finally:
+                    self.log.detach_event_loop()
+
+            try:
+                self.assertGreater(asyncio.run(log_and_tick()), 10)
+            finally:
+                emptier.join()
+
+    def test_a_pipe_is_left_blocking_by_default(self):
+        read_fd, write_fd = os.pipe()
+        with open(read_fd, "rb"), open(write_fd, "w") as writer:
+            sys.stdout = writer
+
+            async def attach_and_check():
+                self.log.attach_event_loop()
+                try:
+                    return os.get_blocking(write_fd), self.get_sinks()
+                finally:
+                    self.log.detach_event_loop()
+
+            blocking, sinks = asyncio.run(attach_and_check())
+            self.assertTrue(blocking)
+            self.assertFalse(any(isinstance(sink, NonBlockingStreamSink) for sink in sinks))
+
+    def test_only_the_sinks_writing_to_stdout_are_replaced(self):
+        read_fd, write_fd = os.pipe()
+        with open(read_fd, "rb") as reader, open(write_fd, "w") as writer:
+            sys.stdout = writer
+            other_sink = TerminalSink(io.StringIO())
+            self.log.add_sink(other_sink)
+            sinks = self.attach(non_blocking_stdout=True)
+            self.assertIn(other_sink, sinks)
+            self.assertTrue(any(isinstance(sink, NonBlockingStreamSink) for sink in sinks))
+            self.assertIn(other_sink, self.get_sinks())
+            self.assertTrue(os.get_blocking(write_fd))
+
+    @unittest.skipUnless(hasattr(os, "openpty"), "pseudo terminals are not available")
+    def test_a_terminal_is_left_blocking(self):
+        master_fd, slave_fd = os.openpty()
+        with open(master_fd, "rb"), open(slave_fd, "w") as terminal:
+            sys.stdout = terminal
+            sinks = self.attach(non_blocking_stdout=True)
+            self.assertFalse(any(isinstance(sink, NonBlockingStreamSink) for sink in sinks))
+            self.assertTrue(os.get_blocking(slave_fd))
+
+    def test_a_repaint_left_on_the_closed_loop_does_not_block_the_next_ones(self):
+        sys.stdout = io.StringIO()
+        sink = MemorySink(interactive=True)
+        self.log.add_sink(sink)
+        self.log.set_terminal_movements_mode(State.ON)
+        self.log.set_max_refresh_rate(5)
+
+        async def log_stickies():
+            self.log.attach_event_loop()
+            await self.log.alog(LogLevel.INFO, "app", "first", sticky=True)
+            await self.log.alog(LogLevel.INFO, "app", "second", sticky=True)
+
+        asyncio.run(log_stickies())
+        self.log.detach_event_loop()
+        self.assertIn("second", sink.get_text())
+
+        self.log.log(LogLevel.INFO, "app", "third", sticky=True)
+        deadline = time.monotonic() + 5
+        while "third" not in sink.get_text() and time.monotonic() < deadline:
+            time.sleep(0.05)
+        self.assertIn("third", sink.get_text())
+
+
+if __name__ == '__main__':
+    unittest.main()
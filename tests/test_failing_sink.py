@@ -0,0 +1,52 @@
+import io
+import sys
+import threading
+import unittest
+
+from loggerz.Loggerz import LogLevel
+from tests.helpers import LoggerzTestCase, MemorySink
+
+
+class _FailingSink(MemorySink):
+    def __init__(self, failures: int):
+        super().__init__()
+        self.failures = failures
+
+    def write(self, output: str):
+        if self.failures > 0:
+            self.failures -= 1
+            raise OSError(28, "No space left on device")
+        super().write(output)
+
+
+class FailingSinkTest(LoggerzTestCase):
+    def setUp(self):
+        super().setUp()
+        self.failing_sink = _FailingSink(1)
+        self.log.add_sink(self.failing_sink)
+        self.stderr = sys.stderr
+        sys.stderr = io.StringIO()
+
+    def tearDown(self):
+        super().tearDown()
+        sys.stderr = self.stderr
+
+    def run_in_thread(self, target):
+        thread = threading.Thread(target=target, daemon=True)
+        thread.start()
+        thread.join(5.0)
+        self.assertFalse(thread.is_alive())
+
+    def test_a_failing_sink_neither_blocks_the_others_nor_the_next_logs(self):
+        self.run_in_thread(lambda: self.log.log(LogLevel.INFO, "app", "first"))
+        self.run_in_thread(lambda: self.log.log(LogLevel.INFO, "app", "second"))
+
+        self.assertIn("first", self.sink.get_text())
+        self.assertIn("second", self.sink.get_text())
+        self.assertNotIn("first", self.failing_sink.get_text())
+        self.assertIn("second", self.failing_sink.get_text())
+        self.assertIn("No space left on device", sys.stderr.getvalue())
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,40 @@
+import unittest
+
+from loggerz.Loggerz import LogLevel, QueuePolicy
+from tests.helpers import LoggerzTestCase
+
+
+class FlightRecorderTest(LoggerzTestCase):
+    def setUp(self):
+        super().setUp()
+        self.log.set_flight_recorder(10)
+
+    def test_a_message_that_cannot_be_rendered_does_not_break_the_dump(self):
+        self.log.log(LogLevel.DEBUG, "db", "before")
+        self.log.log(LogLevel.DEBUG, "db", "bad %d", args=("x",))
+        self.log.log(LogLevel.DEBUG, "db", "after %d", args=(1,))
+        self.log.log(LogLevel.ERROR, "app", "real error")
+
+        text = self.sink.get_text()
+        self.assertIn("before", text)
+        self.assertIn("'bad %d' % ('x',) (TypeError:", text)
+        self.assertIn("after 1", text)
+        self.assertIn("real error", text)
+
+    def test_the_dump_is_not_dropped_by_a_full_async_queue(self):
+        for i in range(3):
+            self.log.log(LogLevel.DEBUG, "db", "context %d", args=(i,))
+        self.log.set_async_mode(True, queue_size=1, queue_policy=QueuePolicy.DROP)
+        for i in range(1000):
+            self.log.log(LogLevel.INFO, "spam", "spam %d", args=(i,))
+        self.log.log_many([(LogLevel.ERROR, "app", "real error")])
+        self.log.flush()
+
+        text = self.sink.get_text()
+        for i in range(3):
+            self.assertIn(f"context {i}", text)
+        self.assertIn("real error", text)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,47 @@
+import json
+import unittest
+
+from loggerz.Loggerz import LogLevel
+from loggerz.sinks.Sinks import Format
+from loggerz.time_utils.TimeUtils import TimestampFormat, TimestampFormatter
+from tests.helpers import LoggerzTestCase, MemorySink
+
+
+class JsonOutputTest(LoggerzTestCase):
+    sink_output_format = Format.JSONL
+
+    def test_every_log_is_a_json_line_with_the_same_content(self):
+        self.log.set_target_log_level(LogLevel.EPHEMERAL)
+        logged = [
+            (LogLevel.INFO, "app", 'double "quotes", \'single\' ones and a \\ backslash', False),
+            (LogLevel.WARNING, 'db "main"', "control chars: \x00 \x07 \x1b[31m \t tab", False),
+            (LogLevel.ERROR, "app", "multi\nline\r\nmessage", False),
+            (LogLevel.INFO, "ünïcödé", "non-ASCII: héllo 日本語 🎉  ", True),
+            (LogLevel.EPHEMERAL, "app", "progress", False),
+        ]
+        for log_level, originator, message, sticky in logged:
+            self.log.log(log_level, originator, message, sticky)
+
+        lines = self.sink.get_text().split("\n")
+        self.assertEqual(lines[-1], "")
+        records = [json.loads(line) for line in lines[:-1]]
+        self.assertEqual([(LogLevel[record["level"]], record["originator"], record["message"], record["sticky"])
+                          for record in records], logged)
+        for record in records:
+            self.assertIsInstance(record["timestamp"], float)
+            self.assertNotIn("time", record)
+
+    def test_the_formatted_time_is_added_when_the_sink_asks_for_it(self):
+        sink = MemorySink(Format.JSONL)
+        sink.timestamp_format = TimestampFormat.ISO8601_UTC
+        self.log.add_sink(sink)
+        self.log.log(LogLevel.INFO, "app", "with the time")
+
+        record = json.loads(sink.get_text())
+        self.assertEqual(record["message"], "with the time")
+        self.assertEqual(record["time"], TimestampFormatter(TimestampFormat.ISO8601_UTC).format(record["timestamp"]))
+        self.assertNotIn("time", json.loads(self.sink.get_text()))
+
+
+if __name__ == '__main__':
+    unittest.main()
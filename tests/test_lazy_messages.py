@@ -0,0 +1,61 @@
+import unittest
+
+from loggerz.Loggerz import LogLevel
+from loggerz.sinks.Sinks import Format
+from tests.helpers import LoggerzTestCase, MemorySink
+
+
+class _Explosive:
+    def __repr__(self):
+        raise AssertionError("rendered although filtered out")
+
+    __str__ = __repr__
+
+
+class _Counting:
+    def __init__(self, text: str):
+        self.text = text
+        self.calls = 0
+
+    def __call__(self) -> str:
+        self.calls += 1
+        return self.text
+
+    def __str__(self) -> str:
+        return self()
+
+
+class LazyMessageTest(LoggerzTestCase):
+    def setUp(self):
+        super().setUp()
+        self.json_sink = MemorySink(Format.JSONL)
+        self.log.add_sink(self.json_sink)
+
+    def test_filtered_messages_are_never_rendered(self):
+        self.log.set_originator_log_level("quiet", LogLevel.ERROR)
+        message = _Counting("expensive")
+        self.log.log(LogLevel.DEBUG, "app", message)
+        self.log.log(LogLevel.DEBUG, "app", "%r", args=(_Explosive(),))
+        self.log.log(LogLevel.WARNING, "quiet", message)
+        self.log.log(LogLevel.WARNING, "quiet", "%s", args=(_Explosive(),))
+        self.log.log_many([(LogLevel.VERBOSE, "app", message), (LogLevel.DEBUG, "app", "%r", False, (_Explosive(),))])
+
+        self.assertEqual(message.calls, 0)
+        self.assertEqual(self.sink.output + self.json_sink.output, [])
+
+    def test_enabled_messages_are_rendered_once_for_every_sink(self):
+        message = _Counting("from a callable")
+        self.log.log(LogLevel.INFO, "app", message)
+        self.assertEqual(message.calls, 1)
+
+        argument = _Counting("an argument")
+        self.log.log(LogLevel.INFO, "app", "from %s", args=(argument,))
+        self.assertEqual(argument.calls, 1)
+
+        for text in (self.sink.get_text(), self.json_sink.get_text()):
+            self.assertIn("from a callable", text)
+            self.assertIn("from an argument", text)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,79 @@
+import os
+import tempfile
+import unittest
+
+from loggerz.Loggerz import LogLevel, parse_log_levels
+from tests.helpers import LoggerzTestCase
+
+
+class LogLevelsTest(LoggerzTestCase):
+    def setUp(self):
+        super().setUp()
+        self.environ = os.environ.get("LOGGERZ_LOG_LEVELS")
+
+    def tearDown(self):
+        super().tearDown()
+        if self.environ is None:
+            os.environ.pop("LOGGERZ_LOG_LEVELS", None)
+        else:
+            os.environ["LOGGERZ_LOG_LEVELS"] = self.environ
+
+    def test_overrides_apply_to_the_originators_below(self):
+        self.log.set_originator_log_level("db", LogLevel.DEBUG)
+        self.log.set_originator_log_level("db.pool", LogLevel.WARNING)
+
+        self.assertTrue(self.log.is_enabled(LogLevel.DEBUG, "db"))
+        self.assertTrue(self.log.is_enabled(LogLevel.DEBUG, "db.query.slow"))
+        self.assertFalse(self.log.is_enabled(LogLevel.INFO, "db.pool"))
+        self.assertTrue(self.log.is_enabled(LogLevel.WARNING, "db.pool.connection"))
+        self.assertFalse(self.log.is_enabled(LogLevel.DEBUG, "dbx"))
+        self.assertFalse(self.log.is_enabled(LogLevel.DEBUG, "http"))
+
+    def test_changes_are_seen_by_the_originators_already_resolved(self):
+        self.log.set_originator_log_level("db", LogLevel.DEBUG)
+        self.log.log(LogLevel.DEBUG, "db.pool", "first")
+        self.log.set_originator_log_level("db", LogLevel.WARNING)
+        self.log.log(LogLevel.DEBUG, "db.pool", "second")
+        self.log.set_originator_log_level("db", None)
+        self.log.set_target_log_level(LogLevel.DEBUG)
+        self.log.log(LogLevel.DEBUG, "db.pool", "third")
+
+        self.assertIn("first", self.sink.get_text())
+        self.assertNotIn("second", self.sink.get_text())
+        self.assertIn("third", self.sink.get_text())
+
+    def test_parse_log_levels(self):
+        self.assertEqual(parse_log_levels("# Levels\n* = warning\n\n db = DEBUG  # Investigating\ndb.pool=Error\n"),
+                         {"*": LogLevel.WARNING, "db": LogLevel.DEBUG, "db.pool": LogLevel.ERROR})
+        self.assertEqual(parse_log_levels("*=INFO,,http=VERBOSE", ","), {"*": LogLevel.INFO, "http": LogLevel.VERBOSE})
+        for text in ("db", "db = LOUD", "= "):
+            with self.assertRaises(ValueError):
+                parse_log_levels(text)
+
+    def test_load_log_levels_from_env(self):
+        os.environ["LOGGERZ_LOG_LEVELS"] = "*=WARNING,db=DEBUG"
+        self.log.set_originator_log_level("http", LogLevel.ERROR)
+        self.log.load_log_levels_from_env()
+
+        self.assertFalse(self.log.is_enabled(LogLevel.INFO, "app"))
+        self.assertTrue(self.log.is_enabled(LogLevel.DEBUG, "db.pool"))
+        self.assertFalse(self.log.is_enabled(LogLevel.WARNING, "http"))
+
+    def test_reloading_the_file_drops_the_removed_entries(self):
+        with tempfile.TemporaryDirectory() as directory:
+            path = os.path.join(directory, "log_levels.conf")
+            with open(path, "w", encoding="utf-8") as file:
+                file.write("db = DEBUG\nhttp = ERROR\n")
+            self.log.load_log_levels_from_file(path)
+            self.assertTrue(self.log.is_enabled(LogLevel.DEBUG, "db"))
+            self.assertFalse(self.log.is_enabled(LogLevel.WARNING, "http"))
+
+            with open(path, "w", encoding="utf-8") as file:
+                file.write("http = ERROR\n")
+            self.log.load_log_levels_from_file(path)
+            self.assertFalse(self.log.is_enabled(LogLevel.DEBUG, "db"))
+            self.assertFalse(self.log.is_enabled(LogLevel.WARNING, "http"))
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,154 @@
+import os
+import tempfile
+import time
+import unittest
+from unittest import mock
+from datetime import datetime
+from datetime import time as time_of_day
+
+from loggerz.Loggerz import LogLevel
+from loggerz.reader.LogReader import INDEX_SUFFIX, LogReader, _MappedSource, query_segments
+from loggerz.sinks.RotatingFileSink import RotatingFileSink
+from loggerz.sinks.Sinks import BufferedFileSink, Format
+from loggerz.time_utils.TimeUtils import TimestampFormat
+from tests.helpers import LoggerzTestCase
+
+
+class LogReaderTest(LoggerzTestCase):
+    def setUp(self):
+        super().setUp()
+        self.directory = tempfile.TemporaryDirectory()
+        self.path = os.path.join(self.directory.name, "app.log")
+        self.file_sink = None
+
+    def tearDown(self):
+        self.close_sink()
+        super().tearDown()
+        self.directory.cleanup()
+
+    def open_sink(self, file_sink):
+        self.file_sink = file_sink
+        self.log.add_sink(file_sink)
+
+    def close_sink(self):
+        if self.file_sink is not None:
+            self.log.remove_sink(self.file_sink)
+            self.file_sink.close()
+            self.file_sink = None
+
+    def log_records(self, count: int, message: str):
+        for i in range(count):
+            self.log.log(LogLevel.WARNING if i % 5 == 0 else LogLevel.INFO, "db" if i % 2 == 0 else "http",
+                         message, args=(i,))
+
+    def test_text_records_are_read_with_their_continuation_lines(self):
+        self.open_sink(BufferedFileSink(self.path, timestamp_format=TimestampFormat.DATETIME))
+        self.log.log(LogLevel.INFO, "app", "first")
+        self.log.blank_line(LogLevel.INFO)
+        self.log.log(LogLevel.WARNING, "db.pool", "multi\nline\nmessage")
+        self.log.log(LogLevel.ERROR, "app", "last")
+        self.close_sink()
+
+        records = list(LogReader(self.path).records())
+        self.assertEqual([(record.log_level, record.originator, record.message) for record in records], [
+            (LogLevel.INFO, "app", "first"),
+            (LogLevel.WARNING, "db.pool", "multi\nline\nmessage"),
+            (LogLevel.ERROR, "app", "last"),
+        ])
+        for record in records:
+            self.assertLess(abs(record.timestamp - time.time()), 60)
+
+    def test_query_filters_by_level_originator_and_time(self):
+        self.open_sink(BufferedFileSink(self.path, output_format=Format.JSONL))
+        self.log_records(20, "early %d")
+        time.sleep(0.01)
+        middle = time.time()
+        time.sleep(0.01)
+        self.log_records(20, "late %d")
+        self.close_sink()
+
+        reader = LogReader(self.path)
+        self.assertEqual(len(list(reader.query())), 40)
+        self.assertEqual([record.message for record in reader.query(min_log_level=LogLevel.WARNING)],
+                         [f"{when} {i}" for when in ("early", "late") for i in range(0, 20, 5)])
+        self.assertEqual([record.message for record in reader.query(originator="http", since=middle)],
+                         [f"late {i}" for i in range(1, 20, 2)])
+        self.assertEqual([record.message for record in reader.query(until=datetime.fromtimestamp(middle))],
+                         [f"early {i}" for i in range(20)])
+        with self.assertRaises(ValueError):
+            list(reader.query(since=datetime.fromtimestamp(middle).time()))
+
+    def test_logs_printing_only_the_time_are_queried_by_time_of_day(self):
+        self.open_sink(BufferedFileSink(self.path, timestamp_format=TimestampFormat.TIME))
+        self.log_records(10, "record %d")
+        self.close_sink()
+
+        reader = LogReader(self.path)
+        records = list(reader.records())
+        self.assertTrue(all(0 <= record.timestamp < 24 * 60 * 60 for record in records))
+        since = records[5].timestamp
+        seconds = int(since)
+        queried = list(reader.query(since=time_of_day(seconds // 3600, seconds // 60 % 60, seconds % 60,
+                                                      round((since - seconds) * 1_000_000))))
+        self.assertEqual([record.message for record in queried],
+                         [record.message for record in records if record.timestamp >= since])
+
+    def test_a_stale_index_is_rebuilt(self):
+        self.open_sink(BufferedFileSink(self.path, flush_interval=0, output_format=Format.JSONL))
+        self.log_records(10, "first %d")
+        self.file_sink.flush()
+        reader = LogReader(self.path)
+        self.assertEqual(len(list(reader.query())), 10)
+        self.assertTrue(os.path.exists(self.path + INDEX_SUFFIX))
+
+        self.log_records(10, "second %d")
+        self.close_sink()
+        self.assertEqual(len(list(reader.query())), 20)
+        self.assertEqual(len(list(LogReader(self.path).query(originator="db"))), 10)
+
+        os.remove(self.path)  # Same name, different content: the sidecar index must not be trusted
+        self.open_sink(BufferedFileSink(self.path, output_format=Format.JSONL))
+        self.log_records(3, "third %d")
+        self.close_sink()
+        self.assertEqual([record.message for record in LogReader(self.path).query()],
+                         [f"third {i}" for i in range(3)])
+
+    def test_an_index_is_extended_from_its_last_record_when_the_file_grows(self):
+        self.open_sink(BufferedFileSink(self.path, flush_interval=0))
+        self.log_records(10, "first %d")
+        self.log.log(LogLevel.ERROR, "app", "last\nline")
+        self.file_sink.flush()
+        reader = LogReader(self.path)
+        last_offset = list(reader.records())[-1].offset
+        self.assertEqual(reader.get_index()["last_offset"], last_offset)
+
+        with open(self.path, "a", encoding="utf-8") as file:
+            file.write("    ⤷ appended later\n")  # The last record gets another continuation line
+        self.log_records(5, "second %d")
+        self.close_sink()
+        with mock.patch.object(_MappedSource, "lines_from", autospec=True,
+                               side_effect=_MappedSource.lines_from) as lines_from:
+            index = reader.get_index()
+        self.assertEqual([call.args[1] for call in lines_from.call_args_list], [last_offset])
+        self.assertEqual(index, LogReader(self.path).get_index())  # Read back from the sidecar file
+
+        os.remove(self.path + INDEX_SUFFIX)
+        self.assertEqual(index["buckets"], LogReader(self.path).get_index()["buckets"])
+        self.assertEqual([record.message for record in reader.query(min_log_level=LogLevel.WARNING)],
+                         ["first 0", "first 5", "last\nline\nappended later", "second 0"])
+
+    def test_query_segments_reads_the_rotated_and_compressed_segments(self):
+        self.open_sink(RotatingFileSink(self.path, max_bytes=2000, backup_count=100, buffer_size=1,
+                                        output_format=Format.JSONL))
+        self.log_records(100, "record %d")
+        self.close_sink()
+
+        self.assertTrue(any(name.endswith(".gz") for name in os.listdir(self.directory.name)))
+        self.assertEqual([record.message for record in query_segments(self.path)],
+                         [f"record {i}" for i in range(100)])
+        self.assertEqual([record.message for record in query_segments(self.path, LogLevel.WARNING)],
+                         [f"record {i}" for i in range(0, 100, 5)])
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,105 @@
+import json
+import multiprocessing
+import os
+import tempfile
+import threading
+import time
+import unittest
+from concurrent.futures import ProcessPoolExecutor
+
+from loggerz.Loggerz import LogLevel, Loggerz
+from loggerz.sinks.Sinks import BufferedFileSink, Format
+from tests.helpers import LoggerzTestCase, MemorySink
+
+WORKERS = 4
+LOGS_PER_WORKER = 500
+
+
+def connect(log_server_queue):
+    Loggerz().connect_to_log_server(log_server_queue)
+
+
+def work(worker: int) -> int:
+    log = Loggerz()
+    for i in range(LOGS_PER_WORKER):
+        log.log(LogLevel.INFO, f"worker-{worker}", "record %d-%d", args=(worker, i))
+    if worker == 0:
+        log.cleanup()  # Must not stop the log server of the parent
+    return worker
+
+
+def log_one(log_server_queue, message: str):
+    connect(log_server_queue)
+    log = Loggerz()
+    log.log(LogLevel.INFO, "child", message)
+    log.flush()
+    log.cleanup()
+
+
+class _SlowSink(MemorySink):
+    def __init__(self):
+        super().__init__()
+        self.writing = threading.Event()
+
+    def write(self, output: str):
+        if not self.writing.is_set():
+            self.writing.set()
+            time.sleep(1.0)  # Holding the print mutex of the listener
+        super().write(output)
+
+
+class LogServerTest(LoggerzTestCase):
+    def setUp(self):
+        super().setUp()
+        self.directory = tempfile.TemporaryDirectory()
+        self.path = os.path.join(self.directory.name, "log.jsonl")
+        self.file_sink = BufferedFileSink(self.path, output_format=Format.JSONL)
+        self.log.add_sink(self.file_sink)
+
+    def tearDown(self):
+        super().tearDown()
+        self.file_sink.close()
+        self.directory.cleanup()
+
+    @unittest.skipUnless("fork" in multiprocessing.get_all_start_methods(), "fork is not available")
+    def test_every_record_arrives_once(self):
+        log_server_queue = self.log.start_log_server()
+        with ProcessPoolExecutor(WORKERS, multiprocessing.get_context("fork"), initializer=connect,
+                                 initargs=(log_server_queue,)) as pool:
+            # One task per worker process, so that worker 0 cleans up while the others are still logging
+            self.assertEqual(sorted(pool.map(work, range(WORKERS))), list(range(WORKERS)))
+        self.log.stop_log_server()
+        self.log.flush()
+
+        with open(self.path, encoding="utf-8") as file:
+            messages = [json.loads(line)["message"] for line in file]
+        expected = [f"record {worker}-{i}" for worker in range(WORKERS) for i in range(LOGS_PER_WORKER)]
+        self.assertEqual(sorted(messages), sorted(expected))
+
+
+    @unittest.skipUnless("fork" in multiprocessing.get_all_start_methods(), "fork is not available")
+    def test_a_child_forked_while_the_listener_prints_does_not_deadlock(self):
+        slow_sink = _SlowSink()
+        self.log.add_sink(slow_sink)
+        log_server_queue = self.log.start_log_server()
+        context = multiprocessing.get_context("fork")
+
+        sender = context.Process(target=log_one, args=(log_server_queue, "first"))
+        sender.start()
+        sender.join(10)
+        self.assertTrue(slow_sink.writing.wait(10))
+
+        child = context.Process(target=log_one, args=(log_server_queue, "second"))
+        child.start()  # Forked while the listener holds the locks
+        child.join(10)
+        if child.is_alive():
+            child.kill()
+        self.assertEqual(child.exitcode, 0)
+
+        self.log.stop_log_server()
+        self.assertIn("first", self.sink.get_text())
+        self.assertIn("second", self.sink.get_text())
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,60 @@
+import threading
+import time
+import unittest
+
+from loggerz.Loggerz import LogLevel
+from loggerz.rate_limit import RateLimiter
+from loggerz.sinks.Sinks import Format
+from tests.helpers import LoggerzTestCase
+
+
+class RateLimitTest(LoggerzTestCase):
+    sink_output_format = Format.JSONL
+
+    def test_suppressions_are_reported_once_quiet_without_flushing(self):
+        self.log.set_rate_limit(10, burst=1, collapse_duplicates=False, report_interval=0.2)
+        burst_time = time.time()
+        for i in range(100):
+            self.log.log(LogLevel.INFO, "spam", "message %d", args=(i,))
+        self.assertNotIn("suppressed", self.sink.get_text())
+
+        deadline = time.monotonic() + 5
+        while "suppressed" not in self.sink.get_text() and time.monotonic() < deadline:
+            time.sleep(0.05)
+        self.assertIn("99 messages suppressed by the rate limit", self.sink.get_text())
+
+        report = [line for line in self.sink.get_text().splitlines() if "suppressed" in line][0]
+        report_time = float(report.split('"timestamp":')[1].split(",")[0])
+        self.assertLess(report_time - burst_time, 0.15)  # The time of the burst, not the time of the report
+
+    def test_the_state_of_idle_pairs_is_forgotten(self):
+        rate_limiter = RateLimiter.RateLimiter(10, 1, True, report_interval=1.0)
+        now = 0.0
+        for i in range(3 * RateLimiter._MAX_ORIGINATOR_STATES):
+            rate_limiter.check(LogLevel.INFO, f"worker-{i}", "message", None, now)
+            now += 0.01
+        self.assertLessEqual(len(rate_limiter._RateLimiter__states), RateLimiter._MAX_ORIGINATOR_STATES)
+
+
+    def test_arguments_that_cannot_be_compared_are_never_collapsed(self):
+        class Uncomparable:
+            def __eq__(self, other):
+                raise ValueError("The truth value of an array is ambiguous")
+
+            def __str__(self):
+                return "uncomparable"
+
+        self.log.set_rate_limit(0, collapse_duplicates=True)
+        self.log.log(LogLevel.INFO, "app", "value %s", args=(Uncomparable(),))
+        self.log.log(LogLevel.INFO, "app", "value %s", args=(Uncomparable(),))
+        logging_thread = threading.Thread(target=self.log.log, args=(LogLevel.INFO, "app", "after"), daemon=True)
+        logging_thread.start()
+        logging_thread.join(5.0)
+
+        self.assertFalse(logging_thread.is_alive())
+        self.assertEqual(self.sink.get_text().count("value uncomparable"), 2)
+        self.assertIn("after", self.sink.get_text())
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,63 @@
+import gzip
+import os
+import tempfile
+import time
+import unittest
+
+from loggerz.sinks.RotatingFileSink import RotatingFileSink
+
+
+class RotatingFileSinkTest(unittest.TestCase):
+    def setUp(self):
+        self.directory = tempfile.TemporaryDirectory()
+        self.path = os.path.join(self.directory.name, "app.log")
+
+    def tearDown(self):
+        self.directory.cleanup()
+
+    def get_segments(self) -> list:
+        return sorted(name for name in os.listdir(self.directory.name) if name.startswith("app.log."))
+
+    def read(self, name: str) -> str:
+        with open(os.path.join(self.directory.name, name), encoding="utf-8") as file:
+            return file.read()
+
+    def test_rotates_once_the_file_is_over_max_bytes(self):
+        sink = RotatingFileSink(self.path, max_bytes=100, backup_count=100, compress=False, buffer_size=1)
+        for i in range(30):
+            sink.write(f"line {i:02d} of the logs\n")  # 20 bytes each
+        sink.close()
+
+        segments = self.get_segments()
+        self.assertEqual(len(segments), 5)
+        self.assertTrue(all(len(self.read(name)) == 100 for name in segments))
+        self.assertEqual("".join(self.read(name) for name in segments + ["app.log"]),
+                         "".join(f"line {i:02d} of the logs\n" for i in range(30)))
+
+    def test_rotates_once_rotate_interval_has_passed(self):
+        sink = RotatingFileSink(self.path, rotate_interval=0.1, compress=False, buffer_size=1)
+        sink.write("before\n")
+        time.sleep(0.15)
+        sink.write("after\n")
+        sink.close()
+
+        segments = self.get_segments()
+        self.assertEqual(len(segments), 1)
+        self.assertEqual(self.read(segments[0]), "before\n")
+        self.assertEqual(self.read("app.log"), "after\n")
+
+    def test_keeps_only_backup_count_compressed_segments(self):
+        sink = RotatingFileSink(self.path, max_bytes=100, backup_count=2, buffer_size=1)
+        for i in range(30):
+            sink.write(f"line {i:02d} of the logs\n")
+        sink.close()
+
+        segments = self.get_segments()
+        self.assertEqual(len(segments), 2)
+        self.assertTrue(all(name.endswith(".gz") for name in segments))
+        with gzip.open(os.path.join(self.directory.name, segments[0]), "rt", encoding="utf-8") as file:
+            self.assertEqual(file.read(), "".join(f"line {i:02d} of the logs\n" for i in range(15, 20)))
+
+
+if __name__ == '__main__':
+    unittest.main()
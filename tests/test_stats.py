@@ -0,0 +1,23 @@
+import unittest
+
+from loggerz.Loggerz import LogLevel
+from tests.helpers import LoggerzTestCase, MemorySink
+
+
+class StatsTest(LoggerzTestCase):
+    def test_bytes_are_counted_in_the_encoding_of_each_sink(self):
+        latin_1_sink = MemorySink()
+        latin_1_sink.encoding = "latin-1"
+        self.log.add_sink(latin_1_sink)
+        self.log.set_stats_enabled(True)
+        self.log.log(LogLevel.INFO, "app", "ascii")
+        self.log.log(LogLevel.INFO, "app", "déjà vu")
+
+        expected = sum(len(output.encode("utf-8")) for output in self.sink.output) + \
+            sum(len(output.encode("latin-1")) for output in latin_1_sink.output)
+        self.assertEqual(self.log.stats()["bytes_written"], expected)
+        self.assertGreater(expected, 2 * len(self.sink.get_text()))  # Not the characters
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,205 @@
+import os
+import re
+import signal
+import sys
+import unittest
+
+from loggerz.Loggerz import LogLevel, State
+from loggerz.sinks.Sinks import TerminalSink
+from loggerz.terminal_utils.TerminalUtils import TerminalSizeCache, get_display_width, shorten_to_display_width
+from tests.helpers import LoggerzTestCase
+
+
+class _Terminal:
+    def __init__(self):
+        self.output = []
+
+    def write(self, output: str):
+        self.output.append(output)
+
+    def flush(self):
+        pass
+
+    def isatty(self) -> bool:
+        return True
+
+
+class _Screen:
+    """
+    The screen of a VT100 terminal, as far as the cursor movements and erasures used by Loggerz go.
+    """
+
+    def __init__(self):
+        self.lines = [""]
+        self.row = 0
+        self.column = 0
+
+    def write(self, output: str):
+        for match in re.finditer("\033\\[([0-9]*)([A-Za-z])|\n|[^\033\n]+", output):
+            text = match.group(0)
+            if text == "\n":
+                self.__move_to(self.row + 1)
+            elif match.group(2) is None:
+                line = self.lines[self.row].ljust(self.column)
+                self.lines[self.row] = line[:self.column] + text + line[self.column + len(text):]
+                self.column += len(text)
+            elif match.group(2) in "AB":
+                lines = int(match.group(1) or 1)
+                self.__move_to(self.row - lines if match.group(2) == "A" else self.row + lines, self.column)
+            elif match.group(2) == "K":
+                self.lines[self.row] = self.lines[self.row][:self.column]
+            elif match.group(2) == "J":
+                self.lines[self.row] = self.lines[self.row][:self.column]
+                del self.lines[self.row + 1:]
+
+    def flush(self):
+        pass
+
+    def __move_to(self, row: int, column: int = 0):
+        self.row = row
+        self.column = column
+        while len(self.lines) <= row:
+            self.lines.append("")
+
+    def get_text(self) -> list:
+        # Without the empty lines at the bottom, that look the same as those never written
+        lines = [line.rstrip() for line in self.lines]
+        while len(lines) > 0 and lines[-1] == "":
+            lines.pop()
+        return lines
+
+
+class DisplayWidthTest(unittest.TestCase):
+    def test_get_display_width(self):
+        self.assertEqual(get_display_width("plain"), 5)
+        self.assertEqual(get_display_width("日本"), 4)
+        self.assertEqual(get_display_width("e\u0301te\u0301"), 3)
+        self.assertEqual(get_display_width("a\tb"), 9)
+        self.assertEqual(get_display_width("\t" * 30 + "é"), 241)
+
+    def test_shorten_to_display_width(self):
+        self.assertEqual(shorten_to_display_width("abcdef", 4), "abc…")
+        self.assertEqual(shorten_to_display_width("abcd", 4), "abcd")
+        self.assertEqual(shorten_to_display_width("日本語テキスト", 7), "日本語…")
+        self.assertEqual(shorten_to_display_width("e\u0301" * 10, 5), "e\u0301" * 4 + "…")
+        self.assertEqual(shorten_to_display_width("a\tb", 20), "a       b")
+
+        shortened = shorten_to_display_width("\t" * 30 + "é", 40)
+        self.assertNotIn("\t", shortened)
+        self.assertEqual(get_display_width(shortened), 40)
+        self.assertTrue(shortened.endswith("…"))
+
+
+class TerminalSizeCacheTest(unittest.TestCase):
+    def setUp(self):
+        self.columns = os.environ.get("COLUMNS")
+        self.stdout = sys.stdout
+        self.sigwinch_handler = signal.getsignal(signal.SIGWINCH) if hasattr(signal, "SIGWINCH") else None
+
+    def tearDown(self):
+        if self.columns is None:
+            os.environ.pop("COLUMNS", None)
+        else:
+            os.environ["COLUMNS"] = self.columns
+        sys.stdout = self.stdout
+        if self.sigwinch_handler is not None:
+            signal.signal(signal.SIGWINCH, self.sigwinch_handler)
+
+    @unittest.skipUnless(hasattr(signal, "SIGWINCH"), "SIGWINCH is not available")
+    def test_polls_once_the_resize_handler_is_replaced(self):
+        sys.stdout = _Terminal()
+        os.environ["COLUMNS"] = "100"
+        terminal_size = TerminalSizeCache(poll_interval=0)
+        self.assertEqual(terminal_size.get_size().columns, 100)
+
+        signal.signal(signal.SIGWINCH, signal.SIG_DFL)
+        os.environ["COLUMNS"] = "60"
+        self.assertEqual(terminal_size.get_size().columns, 60)
+
+    @unittest.skipUnless(hasattr(signal, "SIGWINCH"), "SIGWINCH is not available")
+    def test_leaves_the_resize_handler_alone_without_a_terminal(self):
+        sys.stdout = open(os.devnull, "w")
+        try:
+            TerminalSizeCache()
+            self.assertIs(signal.getsignal(signal.SIGWINCH), self.sigwinch_handler)
+        finally:
+            sys.stdout.close()
+
+
+class VolatileLinesWidthTest(LoggerzTestCase):
+    def setUp(self):
+        super().setUp()
+        self.columns = os.environ.get("COLUMNS")
+
+    def tearDown(self):
+        super().tearDown()
+        if self.columns is None:
+            os.environ.pop("COLUMNS", None)
+        else:
+            os.environ["COLUMNS"] = self.columns
+
+    def test_volatile_lines_leave_the_last_column_free(self):
+        os.environ["COLUMNS"] = "40"
+        terminal = _Terminal()
+        self.log.add_sink(TerminalSink(terminal))
+        self.log.set_terminal_size_poll_interval(0)
+        self.log.set_target_log_level(LogLevel.EPHEMERAL)
+        self.log.set_color_mode(State.OFF)
+        self.log.set_terminal_movements_mode(State.ON)
+        self.log.log(LogLevel.INFO, "test", "x" * 100, True)
+        self.log.log(LogLevel.EPHEMERAL, "test", "y" * 100)
+
+        lines = re.sub("\033\\[[0-9]*[A-Za-z]", "", "".join(terminal.output)).split("\n")
+        drawn_lines = [line for line in lines if "xxx" in line or "yyy" in line]
+        self.assertTrue(any("xxx" in line for line in drawn_lines) and any("yyy" in line for line in drawn_lines))
+        self.assertEqual({get_display_width(line) for line in drawn_lines}, {39})
+
+
+
+class VolatileLinesScreenTest(LoggerzTestCase):
+    def setUp(self):
+        super().setUp()
+        self.screen = _Screen()
+        self.log.add_sink(TerminalSink(self.screen))
+        self.log.set_target_log_level(LogLevel.EPHEMERAL)
+        self.log.set_color_mode(State.OFF)
+        self.log.set_print_timestamp(False)
+        self.log.set_terminal_movements_mode(State.ON)
+
+    def assertScreen(self, lines: list, cursor_row: int):
+        self.assertEqual([re.sub(r"\[ *[^ ]+ *\] \[test *\] ", "", line) for line in self.screen.get_text()], lines)
+        self.assertEqual(self.screen.row, cursor_row)
+        self.assertEqual(self.screen.column, 0)
+
+    def test_the_volatile_lines_are_drawn_below_the_permanent_ones(self):
+        self.log.log(LogLevel.INFO, "test", "first")
+        self.assertScreen(["first"], 1)
+
+        self.log.log(LogLevel.INFO, "test", "status 1", True)
+        self.log.log(LogLevel.EPHEMERAL, "test", "progress 1")
+        self.log.log(LogLevel.EPHEMERAL, "test", "progress 2")
+        self.assertScreen(["first", "progress 1", "progress 2", "", "status 1"], 1)
+
+        self.log.log(LogLevel.INFO, "test", "second")  # Removes the ephemeral logs
+        self.assertScreen(["first", "second", "", "status 1"], 2)
+
+        self.log.log(LogLevel.EPHEMERAL, "test", "progress 3")
+        self.log.log(LogLevel.INFO, "test", "status 2", True)
+        self.assertScreen(["first", "second", "progress 3", "", "status 2"], 2)
+
+        self.log.remove_ephemerals()
+        self.assertScreen(["first", "second", "", "status 2"], 2)
+
+        self.log.blank_line(LogLevel.INFO)
+        self.assertScreen(["first", "second", "", "", "status 2"], 3)
+
+        self.log.log(LogLevel.INFO, "test", "multi\nline", True)
+        self.log.remove_sticky()
+        self.assertScreen(["first", "second"], 3)
+
+        self.log.log(LogLevel.INFO, "test", "third")
+        self.assertScreen(["first", "second", "", "third"], 4)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,38 @@
+import unittest
+from datetime import datetime, timezone
+
+from loggerz.time_utils.TimeUtils import TimestampFormat, TimestampFormatter
+
+
+class TimestampFormatterTest(unittest.TestCase):
+    def setUp(self):
+        self.local_second = datetime(2021, 3, 1, 10, 4, 59).timestamp()
+        self.utc_second = datetime(2021, 3, 1, 9, 4, 59, tzinfo=timezone.utc).timestamp()
+
+    def test_every_format(self):
+        self.assertEqual(TimestampFormatter(TimestampFormat.TIME).format(self.local_second + 0.123), "10:04:59.123")
+        self.assertEqual(TimestampFormatter(TimestampFormat.DATETIME).format(self.local_second + 0.123),
+                         "2021-03-01 10:04:59.123")
+        self.assertEqual(TimestampFormatter(TimestampFormat.ISO8601_UTC).format(self.utc_second + 0.123),
+                         "2021-03-01T09:04:59.123Z")
+
+    def test_milliseconds_are_truncated(self):
+        formatter = TimestampFormatter(TimestampFormat.TIME)
+        self.assertEqual(formatter.format(self.local_second), "10:04:59.000")
+        self.assertEqual(formatter.format(self.local_second + 0.0019), "10:04:59.001")
+        self.assertEqual(formatter.format(self.local_second + 0.5), "10:04:59.500")
+        self.assertEqual(formatter.format(self.local_second + 0.9996), "10:04:59.999")
+        for milliseconds in range(1000):
+            self.assertEqual(formatter.format(self.local_second + milliseconds / 1000), f"10:04:59.{milliseconds:03d}")
+
+    def test_the_cached_second_changes_at_the_second_boundary(self):
+        formatter = TimestampFormatter(TimestampFormat.DATETIME)
+        self.assertEqual(formatter.format(self.local_second + 0.999), "2021-03-01 10:04:59.999")
+        self.assertEqual(formatter.format(self.local_second + 1), "2021-03-01 10:05:00.000")
+        self.assertEqual(formatter.format(self.local_second + 0.9999999), "2021-03-01 10:05:00.000")  # As datetime
+        self.assertEqual(formatter.format(self.local_second + 0.5), "2021-03-01 10:04:59.500")
+        self.assertEqual(formatter.format(self.local_second + 3600 * 14 + 1.25), "2021-03-02 00:05:00.250")
+
+
+if __name__ == '__main__':
+    unittest.main()